@@ -0,0 +1,303 @@
+"""Benchmarks of daman hot paths against a local stand-in provider.
+
+Every scenario runs in a fresh interpreter with its own configuration, so that
+peak memory is measured per scenario, e.g.:
+
+    python benchmarks/hot_paths.py --size 1 16 --keys 10 100 --output results.json
+    python benchmarks/hot_paths.py --compare results.json
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from itertools import product
+from datetime import datetime
+
+MB = 2 ** 20
+SCENARIOS = {}
+# the checkout is benchmarked, whether or not daman is installed
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def scenario(func):
+    SCENARIOS[func.__name__] = func
+    return func
+
+
+def payload(size: float):
+    return os.urandom(int(size * MB))
+
+
+@scenario
+def push_local(dm, size, keys, repeat):
+    obj = payload(size)
+    timings = []
+    for index in range(keys):
+        start = time.perf_counter()
+        dm.push(obj, key=f"key-{index}", local=True)
+        timings.append(time.perf_counter() - start)
+    return timings, size * keys
+
+
+@scenario
+def push_remote(dm, size, keys, repeat):
+    obj = payload(size)
+    timings = []
+    for index in range(keys):
+        start = time.perf_counter()
+        dm.push(obj, key=f"key-{index}", local=False)
+        timings.append(time.perf_counter() - start)
+    return timings, size * keys
+
+
+@scenario
+def cold_pull(dm, size, keys, repeat):
+    obj = payload(size)
+    for index in range(keys):
+        dm.push(obj, key=f"key-{index}", local=False)
+    timings = []
+    for index in range(keys):
+        start = time.perf_counter()
+        dm.pull(f"key-{index}")
+        timings.append(time.perf_counter() - start)
+    return timings, size * keys
+
+
+@scenario
+def warm_pull(dm, size, keys, repeat):
+    obj = payload(size)
+    for index in range(keys):
+        dm.push(obj, key=f"key-{index}", local=True)
+    timings = []
+    for _, index in product(range(repeat), range(keys)):
+        start = time.perf_counter()
+        dm.pull(f"key-{index}")
+        timings.append(time.perf_counter() - start)
+    return timings, size * keys * repeat
+
+
+@scenario
+def memory_only_pull(dm, size, keys, repeat):
+    obj = payload(size)
+    for index in range(keys):
+        dm.push(obj, key=f"key-{index}", local=False)
+    timings = []
+    for _, index in product(range(repeat), range(keys)):
+        start = time.perf_counter()
+        dm.pull(f"key-{index}", memory_only=True)
+        timings.append(time.perf_counter() - start)
+    return timings, size * keys * repeat
+
+
+@scenario
+def summary(dm, size, keys, repeat):
+    obj = payload(size)
+    for index in range(keys):
+        dm.push(obj, key=f"key-{index}", local=index % 2 == 0)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in dm.iter_summary():
+            pass
+        timings.append(time.perf_counter() - start)
+    return timings, 0
+
+
+@scenario
+def clear_disc(dm, size, keys, repeat):
+    obj = payload(size)
+    for index in range(keys):
+        dm.push(obj, key=f"key-{index}", local=True)
+    # making room for half of the cached entries
+    space = dm.available_disc() + size * keys / 2
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        dm.clear_disc(space=space, dry_run=True)
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    dm.clear_disc(space=space)
+    timings.append(time.perf_counter() - start)
+    return timings, 0
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def run_scenario(args):
+    """Runs a single scenario in the current (fresh) interpreter, prints its results as JSON."""
+    home = tempfile.mkdtemp(prefix="daman-benchmark-")
+    # daman reads its configuration from the home directory when imported
+    os.environ["HOME"] = home
+    from daman.configure import configure
+    from daman.data_manager import DataManager
+
+    logging.getLogger("daman").setLevel(logging.WARNING)
+    configure(
+        storage_name=os.path.join(home, "remote")
+        if args.service == "local"
+        else "benchmark",
+        service=args.service,
+        allocated_space=int(args.size * args.keys * 2) + 64,
+        latency=args.latency,
+        bandwidth=args.bandwidth,
+    )
+    dm = DataManager()
+    # lazily imported dependencies are not part of the measures
+    from tqdm import tqdm
+    from daman.compression import get_joblib
+
+    get_joblib()
+
+    timings, transferred = SCENARIOS[args.run](
+        dm, size=args.size, keys=args.keys, repeat=args.repeat
+    )
+    total = sum(timings)
+    result = {
+        "scenario": args.run,
+        "size_mb": args.size,
+        "keys": args.keys,
+        "operations": len(timings),
+        "p50_ms": percentile(timings, 50) * 1000,
+        "p90_ms": percentile(timings, 90) * 1000,
+        "p99_ms": percentile(timings, 99) * 1000,
+        "mean_ms": total / len(timings) * 1000,
+        "ops_per_s": len(timings) / total if total else None,
+        "throughput_mb_s": transferred / total if total and transferred else None,
+        # kilobytes on linux, bytes on macOS
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        / (MB if sys.platform == "darwin" else 2 ** 10),
+    }
+    print(json.dumps(result))
+
+
+def spawn(args, name, size, keys):
+    command = [
+        sys.executable,
+        __file__,
+        "--run",
+        name,
+        "--service",
+        args.service,
+        "--size",
+        str(size),
+        "--keys",
+        str(keys),
+        "--repeat",
+        str(args.repeat),
+    ]
+    if args.latency is not None:
+        command += ["--latency", str(args.latency)]
+    if args.bandwidth is not None:
+        command += ["--bandwidth", str(args.bandwidth)]
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])
+        ),
+    }
+    process = subprocess.run(command, capture_output=True, text=True, env=env)
+    if process.returncode != 0:
+        sys.exit(f"`{name}` failed:\n{process.stderr}")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def compare(results, reference_path):
+    with open(reference_path) as fr:
+        reference = {
+            (result["scenario"], result["size_mb"], result["keys"]): result
+            for result in json.load(fr)["results"]
+        }
+    print(f"\ncompared to {reference_path} (p50):")
+    for result in results:
+        previous = reference.get(
+            (result["scenario"], result["size_mb"], result["keys"])
+        )
+        if previous is not None and previous["p50_ms"]:
+            change = result["p50_ms"] / previous["p50_ms"] - 1
+            print(
+                f"{result['scenario']:<18} {result['size_mb']:>8g} {result['keys']:>6} {change:+8.1%}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        default=list(SCENARIOS),
+        choices=list(SCENARIOS),
+        help="scenarios to run, all by default",
+    )
+    parser.add_argument(
+        "--size", type=float, nargs="+", default=[1.0], help="object sizes in MB",
+    )
+    parser.add_argument(
+        "--keys", type=int, nargs="+", default=[10], help="numbers of keys",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="repetitions of read scenarios",
+    )
+    parser.add_argument(
+        "--service", type=str, default="memory", choices=["memory", "local"],
+    )
+    parser.add_argument(
+        "--latency", type=float, default=None, help="seconds added to each request",
+    )
+    parser.add_argument(
+        "--bandwidth", type=float, default=None, help="transfer bandwidth in MB/s",
+    )
+    parser.add_argument("--output", type=str, default=None, help="JSON results path")
+    parser.add_argument(
+        "--compare", type=str, default=None, help="JSON results to compare to",
+    )
+    parser.add_argument("--run", type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run is not None:
+        args.size, args.keys = args.size[0], args.keys[0]
+        return run_scenario(args)
+
+    results = []
+    print(
+        f"{'scenario':<18} {'size MB':>8} {'keys':>6} {'p50 ms':>9} {'p90 ms':>9} "
+        f"{'p99 ms':>9} {'MB/s':>9} {'RSS MB':>8}"
+    )
+    for name, size, keys in product(args.scenarios, args.size, args.keys):
+        result = spawn(args, name, size=size, keys=keys)
+        results.append(result)
+        throughput = result["throughput_mb_s"]
+        print(
+            f"{name:<18} {size:>8g} {keys:>6} {result['p50_ms']:>9.2f} {result['p90_ms']:>9.2f} "
+            f"{result['p99_ms']:>9.2f} {throughput or 0:>9.1f} {result['peak_rss_mb']:>8.1f}",
+            flush=True,
+        )
+
+    if args.output is not None:
+        with open(args.output, "w") as fw:
+            json.dump(
+                {
+                    "created_at": datetime.now().isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "service": args.service,
+                    "latency": args.latency,
+                    "bandwidth": args.bandwidth,
+                    "results": results,
+                },
+                fw,
+                indent=2,
+            )
+    if args.compare is not None:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
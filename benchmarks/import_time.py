@@ -0,0 +1,63 @@
+"""Import time of daman and of its command line entry points.
+
+Each module is imported in a fresh interpreter, the median of several runs is
+reported and the benchmark fails when it exceeds `--max-ms`, e.g.:
+
+    python benchmarks/import_time.py --max-ms 150
+"""
+import sys
+import json
+import argparse
+import subprocess
+from statistics import median
+
+MODULES = ["daman", "daman.commands", "daman.data_manager"]
+
+
+def import_time(module: str, runs: int):
+    """Median import time of `module` in milliseconds, excluding the interpreter startup."""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - start)"
+    )
+    timings = [
+        float(
+            subprocess.run(
+                [sys.executable, "-c", code],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        )
+        * 1000
+        for _ in range(runs)
+    ]
+    return median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="runs per module")
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="fails when a module takes longer to import",
+    )
+    parser.add_argument("--output", type=str, default=None, help="JSON results path")
+    args = parser.parse_args()
+
+    results = {module: import_time(module, runs=args.runs) for module in MODULES}
+    for module, duration in results.items():
+        print(f"{module:<24} {duration:8.1f} ms")
+    if args.output is not None:
+        with open(args.output, "w") as fw:
+            json.dump(results, fw, indent=2)
+    if args.max_ms is not None:
+        slow = [module for module, duration in results.items() if duration > args.max_ms]
+        if slow:
+            sys.exit(f"import time above {args.max_ms} ms: {', '.join(slow)}")
+
+
+if __name__ == "__main__":
+    main()
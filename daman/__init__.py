@@ -1,7 +1,23 @@
 import logging
+from threading import Lock
 from daman.configure import HOME_DIR, CONFIG_DIR, CLOUD_SERVICES
-from daman.data_manager import DataManager
 
 logging.basicConfig(level=logging.INFO)
 
-daman = DataManager()
+_daman_lock = Lock()
+
+
+def __getattr__(name):
+    # the data manager and its dependencies are only imported on first use
+    if name == "DataManager":
+        from daman.data_manager import DataManager
+
+        return DataManager
+    if name == "daman":
+        with _daman_lock:
+            if "daman" not in globals():
+                from daman.data_manager import DataManager
+
+                globals()["daman"] = DataManager()
+        return globals()["daman"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
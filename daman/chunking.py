@@ -0,0 +1,171 @@
+import io
+import hashlib
+import orjson
+from bisect import bisect_right
+from pathlib import Path
+from functools import lru_cache
+from typing import IO, List, Tuple, Union
+
+
+MIN_CHUNK_SIZE = 2 ** 18  # 256KB
+AVG_CHUNK_SIZE = 2 ** 20  # 1MB
+MAX_CHUNK_SIZE = 2 ** 22  # 4MB
+WINDOW_SIZE = 64  # bytes contributing to the rolling hash
+BLOCK_SIZE = 2 * MAX_CHUNK_SIZE  # bytes hashed at once
+
+MANIFEST_HEADER = b'{"daman_manifest"'
+MANIFEST_VERSION = 1
+
+
+def _numpy():
+    # numpy is only imported once an object is actually chunked
+    try:
+        import numpy as np
+    except ImportError:  # pragma: no cover - optional dependency
+        np = None
+    msg = "chunked storage requires the `numpy` package."
+    assert np is not None, msg
+    return np
+
+
+@lru_cache(maxsize=None)
+def _gear_table():
+    # fixed random values so that every machine splits identical content identically
+    np = _numpy()
+    seed = hashlib.sha256(b"daman-gear").digest()
+    values = []
+    while len(values) < 256:
+        seed = hashlib.sha256(seed).digest()
+        values.extend(
+            int.from_bytes(seed[i : i + 4], "little") for i in range(0, 32, 4)
+        )
+    return np.array(values[:256], dtype=np.uint32)
+
+
+def _cut_points(
+    block: bytes,
+    min_size: int = MIN_CHUNK_SIZE,
+    avg_size: int = AVG_CHUNK_SIZE,
+    max_size: int = MAX_CHUNK_SIZE,
+):
+    """Chunk ends found in `block`, which must start at a chunk boundary.
+
+    Boundaries are placed after bytes where the sum of the gear values of the
+    last `WINDOW_SIZE` bytes has its low bits set to 0, so that they only depend
+    on the surrounding content and survive insertions and deletions elsewhere.
+    """
+    np = _numpy()
+    data = np.frombuffer(block, dtype=np.uint8)
+    sums = np.cumsum(_gear_table()[data], dtype=np.uint32)
+    window = sums.copy()
+    window[WINDOW_SIZE:] -= sums[:-WINDOW_SIZE]
+    mask = np.uint32((1 << max(int(np.log2(avg_size - min_size)), 1)) - 1)
+    candidates = np.flatnonzero((window & mask) == 0) + 1
+
+    cuts = []
+    start = 0
+    while True:
+        index = np.searchsorted(candidates, start + min_size)
+        end = int(candidates[index]) if index < len(candidates) else len(data)
+        end = min(end, start + max_size)
+        if end >= len(data):
+            break
+        cuts.append(end)
+        start = end
+    return cuts
+
+
+def iter_chunks(fileobj: IO[bytes], block_size: int = BLOCK_SIZE):
+    """Splits the content of `fileobj` in content defined chunks, streaming it by blocks."""
+    _numpy()
+    pending = b""
+    while True:
+        data = fileobj.read(block_size)
+        block = pending + data
+        if not block:
+            return
+        cuts = _cut_points(block)
+        start = 0
+        for end in cuts:
+            yield block[start:end]
+            start = end
+        pending = block[start:]
+        if not data:
+            # end of file, the last chunk ends with the content
+            if pending:
+                yield pending
+            return
+
+
+def chunk_hash(chunk: bytes):
+    return hashlib.sha256(chunk).hexdigest()
+
+
+def dump_manifest(chunks: List[Tuple[str, int]], **fields):
+    manifest = {"daman_manifest": MANIFEST_VERSION, **fields, "chunks": chunks}
+    return orjson.dumps(manifest)
+
+
+def load_manifest(content: bytes):
+    return orjson.loads(content)
+
+
+def is_manifest(file_path: Union[str, Path]):
+    with Path(file_path).open("rb") as fr:
+        return fr.read(len(MANIFEST_HEADER)) == MANIFEST_HEADER
+
+
+class ChunkedReader(io.RawIOBase):
+    """Seekable read-only file over the concatenation of several chunk files."""
+
+    def __init__(self, paths: List[Union[str, Path]], sizes: List[int]):
+        self.paths = [Path(path) for path in paths]
+        self.offsets = [0]
+        for size in sizes:
+            self.offsets.append(self.offsets[-1] + size)
+        self.position = 0
+        self._index = None
+        self._file = None
+
+    @property
+    def size(self):
+        return self.offsets[-1]
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        return self.position
+
+    def readinto(self, buffer):
+        if self.position >= self.size:
+            return 0
+        index = bisect_right(self.offsets, self.position) - 1
+        if index != self._index:
+            if self._file is not None:
+                self._file.close()
+            self._file = self.paths[index].open("rb")
+            self._index = index
+        self._file.seek(self.position - self.offsets[index])
+        length = min(len(buffer), self.offsets[index + 1] - self.position)
+        read = self._file.readinto(memoryview(buffer)[:length])
+        self.position += read
+        return read
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        super().close()
@@ -0,0 +1,106 @@
+import sys
+import base64
+from io import BytesIO
+from pathlib import Path
+from typing import IO, Union
+
+from daman.compression import get_joblib, parse_codec
+
+
+PARQUET_MAGIC = b"PAR1"
+# parquet compression of each codec, zlib streams being written as gzip
+PARQUET_CODECS = {"none": "none", "zlib": "gzip", "lz4": "lz4", "zstd": "zstd"}
+# parquet schema metadata written by daman
+KIND_KEY = b"daman.kind"
+META_KEY = b"daman.meta"
+
+
+def _pyarrow():
+    # pyarrow is only imported once an object is actually stored as columns
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:  # pragma: no cover - optional dependency
+        pyarrow = None
+    msg = "columnar storage requires the `pyarrow` package."
+    assert pyarrow is not None, msg
+    return pyarrow
+
+
+def is_parquet(file_path: Union[str, Path]):
+    with Path(file_path).open("rb") as fr:
+        return fr.read(len(PARQUET_MAGIC)) == PARQUET_MAGIC
+
+
+def _to_table(obj: object):
+    """Arrow table of `obj` and the kind of object it is read back as."""
+    pa = _pyarrow()
+    if isinstance(obj, pa.Table):
+        return obj, "arrow"
+    # pandas is necessarily imported already when `obj` is a DataFrame
+    pandas = sys.modules.get("pandas")
+    if pandas is not None and isinstance(obj, pandas.DataFrame):
+        return pa.Table.from_pandas(obj), "pandas"
+    if isinstance(obj, dict):
+        return pa.table(obj), "columns"
+    raise TypeError(
+        "columnar storage requires a pandas DataFrame, a pyarrow Table or a dictionary"
+        f" of columns, got `{type(obj).__name__}`."
+    )
+
+
+def write_columnar(obj: object, meta: object, file: IO[bytes], codec: str = None):
+    """Writes `obj` as parquet, `meta` being kept in the schema metadata."""
+    pa = _pyarrow()
+    table, kind = _to_table(obj)
+    with BytesIO() as buffer:
+        get_joblib().dump(meta, buffer)
+        metadata = {
+            KIND_KEY: kind.encode(),
+            META_KEY: base64.b64encode(buffer.getvalue()),
+        }
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), **metadata}
+    )
+    name, level = parse_codec(codec)
+    pa.parquet.write_table(
+        table, file, compression=PARQUET_CODECS[name], compression_level=level
+    )
+
+
+def read_columnar(
+    source: Union[str, Path, IO[bytes]], columns: list = None, filters: object = None
+):
+    """Reads `columns` of the rows matching `filters` of a parquet file.
+
+    `filters` is a pyarrow expression or a list of `(column, op, value)` tuples (as
+    in `pandas.read_parquet`). Row groups are skipped using their statistics and
+    only the needed column chunks are read, e.g. through ranged requests from a
+    `RangeReader`. Returns `(data, meta)` as `pull` does.
+    """
+    pa = _pyarrow()
+    if isinstance(source, (str, Path)):
+        # local files are memory mapped, only the pages actually read being loaded
+        with pa.memory_map(str(source)) as mapped:
+            return read_columnar(mapped, columns=columns, filters=filters)
+    if filters is not None and not isinstance(filters, pa.dataset.Expression):
+        filters = pa.parquet.filters_to_expression(filters)
+    fragment = pa.dataset.ParquetFileFormat().make_fragment(source)
+    table = fragment.to_table(columns=columns, filter=filters)
+
+    metadata = fragment.physical_schema.metadata or {}
+    meta = None
+    if META_KEY in metadata:
+        with BytesIO(base64.b64decode(metadata[META_KEY])) as buffer:
+            meta = get_joblib().load(buffer)
+    kind = metadata.get(KIND_KEY, b"arrow").decode()
+    if kind == "pandas":
+        return table.to_pandas(), meta
+    if kind == "columns":
+        columns = {
+            name: column.to_numpy()
+            for name, column in zip(table.column_names, table.columns)
+        }
+        return columns, meta
+    return table, meta
@@ -4,3 +4,4 @@ from daman.commands.aws import configure_aws_command
 from daman.commands.delete import delete_command
 from daman.commands.clear import clear_command
 from daman.commands.summary import summary_command
+from daman.commands.prefetch import prefetch_command
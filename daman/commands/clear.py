@@ -1,5 +1,5 @@
 import argparse
-from daman import daman as dm
+from daman.eviction import EVICTION_POLICIES
 
 
 def clear_command():
@@ -7,14 +7,50 @@ def clear_command():
     parser.add_argument(
         "--space",
         type=int,
+        default=None,
         help="Amount of disc space in MegaBytes to clear.",
-        required=True,
     )
     parser.add_argument(
         "--ignore-persist",
         action="store_true",
-        help="When provided, deletes the requested file on the cloud service as well.",
+        help="When provided, persisted files can be deleted as well.",
+    )
+    parser.add_argument(
+        "--eviction",
+        type=str,
+        default=None,
+        help=f"eviction policy used instead of the configured one: {', '.join(EVICTION_POLICIES)} (e.g. ttl:60)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="When provided, only lists the files that would be deleted.",
+    )
+    parser.add_argument(
+        "--reconcile",
+        action="store_true",
+        help="When provided, compares the local registery with the data folder, unregistering missing files and deleting unregistered ones.",
     )
     args = parser.parse_args()
+    if args.space is None and not args.reconcile:
+        parser.error("--space or --reconcile must be provided.")
+
+    from daman import daman as dm
 
-    dm.clear_disc(space=args.space, force=args.ignore_persist)
+    if args.reconcile:
+        report = dm.reconcile(fix=not args.dry_run)
+        for name, values in report.items():
+            print(f"{name}: {len(values)}")
+            for value in values:
+                print(f"  {value}")
+    if args.space is None:
+        return
+
+    evicted = dm.clear_disc(
+        space=args.space,
+        ignore_persist=args.ignore_persist,
+        eviction=args.eviction,
+        dry_run=args.dry_run,
+    )
+    if args.dry_run:
+        print("\n".join(evicted) if evicted else "no file would be deleted.")
@@ -33,6 +33,93 @@ def configure_command():
         default=None,
         help="disc space allocated to local directory",
     )
+    parser.add_argument(
+        "--index_ttl",
+        type=int,
+        default=None,
+        help="seconds during which the remote key index is used before being refreshed",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=None,
+        help="seconds added to each request of the local and memory services",
+    )
+    parser.add_argument(
+        "--bandwidth",
+        type=float,
+        default=None,
+        help="bandwidth in MB/s the transfers of the local and memory services are throttled to",
+    )
+    parser.add_argument(
+        "--validation",
+        type=str,
+        default=None,
+        choices=["always", "etag", "ttl", "never"],
+        help="how local files are validated against their remote version on pull",
+    )
+    parser.add_argument(
+        "--validation_ttl",
+        type=int,
+        default=None,
+        help="minutes during which a validated local file is trusted with the `ttl` validation",
+    )
+    parser.add_argument(
+        "--multipart_threshold",
+        type=int,
+        default=None,
+        help="size in MegaBytes above which transfers are split in parts",
+    )
+    parser.add_argument(
+        "--multipart_chunksize",
+        type=int,
+        default=None,
+        help="size in MegaBytes of each part of a transfer",
+    )
+    parser.add_argument(
+        "--max_concurrency",
+        type=int,
+        default=None,
+        help="maximum number of parts transferred concurrently",
+    )
+    parser.add_argument(
+        "--max_pool_connections",
+        type=int,
+        default=None,
+        help="maximum number of connections kept open to the cloud service",
+    )
+    parser.add_argument(
+        "--eviction",
+        type=str,
+        default=None,
+        help="eviction policy of local files: lru, lfu, gdsf or ttl, optionally followed by a number of minutes (e.g. ttl:60)",
+    )
+    parser.add_argument(
+        "--codec",
+        type=str,
+        default=None,
+        help="default compression codec used on push: none, zlib, lz4 or zstd, optionally followed by a level (e.g. zstd:3)",
+    )
+    parser.add_argument(
+        "--mmap_mode",
+        type=str,
+        default=None,
+        choices=["r", "c"],
+        help="default memory mapping mode of arrays loaded from local files",
+    )
+    parser.add_argument(
+        "--storage",
+        type=str,
+        default=None,
+        choices=["file", "chunked", "columnar"],
+        help="default storage of pushed objects, chunked storage only uploads the chunks that changed, columnar storage stores DataFrames as parquet",
+    )
+    parser.add_argument(
+        "--object_cache_size",
+        type=float,
+        default=None,
+        help="size in MB of the in-memory cache of pulled objects",
+    )
     args = parser.parse_args()
 
     configure(
@@ -40,4 +127,20 @@ def configure_command():
         service=args.service,
         local_dir=args.local_dir,
         allocated_space=args.allocated_space,
+        index_ttl=args.index_ttl,
+        latency=args.latency,
+        bandwidth=args.bandwidth,
+        validation=args.validation,
+        validation_ttl=args.validation_ttl,
+        eviction=args.eviction,
+        codec=args.codec,
+        mmap_mode=args.mmap_mode,
+        storage=args.storage,
+        object_cache_size=args.object_cache_size,
+        transfer_settings={
+            "multipart_threshold": args.multipart_threshold,
+            "multipart_chunksize": args.multipart_chunksize,
+            "max_concurrency": args.max_concurrency,
+            "max_pool_connections": args.max_pool_connections,
+        },
     )
@@ -1,5 +1,4 @@
 import argparse
-from daman import daman as dm
 
 
 def delete_command():
@@ -14,6 +13,8 @@ def delete_command():
     )
     args = parser.parse_args()
 
+    from daman import daman as dm
+
     dm.delete(
         key=args.key, local=True, remote=args.remote,
     )
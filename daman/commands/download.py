@@ -1,5 +1,4 @@
 import argparse
-from daman import daman as dm
 
 
 def download_command():
@@ -17,6 +16,20 @@ def download_command():
         action="store_true",
         help="When provided ensures that the downloaded file is always kept on disc on manually deleted.",
     )
+    parser.add_argument(
+        "--validation",
+        type=str,
+        default=None,
+        choices=["always", "etag", "ttl", "never"],
+        help="How an already available file is validated against its remote version.",
+    )
     args = parser.parse_args()
 
-    dm.pull(key=args.key, force=args.force, persist=args.persist)
+    from daman import daman as dm
+
+    dm.pull(
+        key=args.key,
+        force=args.force,
+        persist=args.persist,
+        validation=args.validation,
+    )
@@ -0,0 +1,59 @@
+import sys
+import argparse
+
+
+def prefetch_command():
+    parser = argparse.ArgumentParser(
+        description="Downloads the keys missing locally ahead of their use."
+    )
+    parser.add_argument(
+        "--keys", type=str, nargs="+", default=None, help="keys to prefetch"
+    )
+    parser.add_argument(
+        "--prefix", type=str, default=None, help="prefetches every key under prefix"
+    )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        default=None,
+        help="file listing the keys to prefetch, one per line",
+    )
+    parser.add_argument(
+        "--persist",
+        action="store_true",
+        help="When provided ensures that the prefetched files are always kept on disc.",
+    )
+    parser.add_argument(
+        "--validation",
+        type=str,
+        default=None,
+        choices=["always", "etag", "ttl", "never"],
+        help="How an already available file is validated against its remote version.",
+    )
+    parser.add_argument(
+        "--max-workers", type=int, default=None, help="number of concurrent downloads",
+    )
+    args = parser.parse_args()
+    if args.keys is None and args.prefix is None and args.manifest is None:
+        parser.error("--keys, --prefix or --manifest must be provided.")
+
+    from daman import daman as dm
+    from daman.data_manager import DEFAULT_MAX_WORKERS
+
+    results = dm.prefetch(
+        keys=args.keys,
+        prefix=args.prefix,
+        manifest=args.manifest,
+        persist=args.persist,
+        validation=args.validation,
+        max_workers=args.max_workers or DEFAULT_MAX_WORKERS,
+    )
+    failed = [result for result in results if result.error is not None]
+    downloaded = sum(1 for result in results if result.value)
+    print(
+        f"downloaded: {downloaded}, already available: {len(results) - downloaded - len(failed)}, failed: {len(failed)}"
+    )
+    for result in failed:
+        print(f"  {result.key}: {result.error}")
+    if failed:
+        sys.exit(1)
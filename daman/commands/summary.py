@@ -1,5 +1,51 @@
-from daman import daman as dm
+import argparse
 
 
 def summary_command():
-    print(dm.summary)
+    parser = argparse.ArgumentParser(description="Summarises stored files.")
+    parser.add_argument(
+        "--meta",
+        action="store_true",
+        help="When provided, adds the meta information of each file.",
+    )
+    parser.add_argument(
+        "--prefix", type=str, default=None, help="only keys starting with prefix",
+    )
+    parser.add_argument(
+        "--pattern",
+        type=str,
+        default=None,
+        help="only keys matching a glob pattern (e.g. 'models/*.pkl')",
+    )
+    parser.add_argument(
+        "--sort",
+        type=str,
+        default=None,
+        choices=["key", "size", "local", "remote"],
+        help="sorts files instead of listing them as they come",
+    )
+    parser.add_argument(
+        "--desc", action="store_true", help="When provided, sorts in descending order.",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=None, help="maximum number of files listed",
+    )
+    args = parser.parse_args()
+
+    from daman import daman as dm
+
+    rows = dm.iter_summary(
+        prefix=args.prefix,
+        pattern=args.pattern,
+        sort=args.sort,
+        descending=args.desc,
+        limit=args.limit,
+        meta=args.meta,
+    )
+    # printed as they come, so that huge buckets are listed without building a table
+    print(f"{'size (MB)':>10}  {'local':<5}  {'remote':<6}  key")
+    for row in rows:
+        line = f"{row['size (MB)']:>10.2f}  {row['local']!s:<5}  {row['remote']!s:<6}  {row['key']}"
+        if args.meta:
+            line = f"{line}  {row['meta']!r}"
+        print(line, flush=True)
@@ -0,0 +1,100 @@
+from pathlib import Path
+from typing import Union
+
+try:
+    import lz4
+except ImportError:  # pragma: no cover - optional dependency
+    lz4 = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+# codec name -> default compression level, level 0 meaning no compression to joblib
+CODECS = {"none": None, "zlib": 3, "lz4": 1, "zstd": 3}
+DEFAULT_CODEC = "none"
+
+# magic numbers of the compressed files written by joblib
+PREFIXES = {
+    b"x": "zlib",
+    b"\x04\x22\x4d\x18": "lz4",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+REQUIREMENTS = {"lz4": lz4, "zstd": zstandard}
+
+# joblib (and numpy) are only imported once objects are (de)serialised
+_joblib = None
+
+
+def get_joblib():
+    """Imports joblib on first use, registering the compressors it lacks."""
+    global _joblib
+    if _joblib is None:
+        import joblib
+        from joblib.compressor import CompressorWrapper
+
+        class ZstdCompressorWrapper(CompressorWrapper):
+            """zstandard support for joblib, registered under the `zstd` name."""
+
+            def __init__(self):
+                CompressorWrapper.__init__(
+                    self, obj=None, prefix=b"\x28\xb5\x2f\xfd", extension=".zst"
+                )
+
+            def compressor_file(self, fileobj, compresslevel=None):
+                if compresslevel is None:
+                    compresslevel = CODECS["zstd"]
+                compressor = zstandard.ZstdCompressor(level=compresslevel)
+                return zstandard.open(fileobj, "wb", cctx=compressor, closefd=False)
+
+            def decompressor_file(self, fileobj):
+                return zstandard.open(fileobj, "rb", closefd=False)
+
+        if zstandard is not None:
+            joblib.register_compressor("zstd", ZstdCompressorWrapper(), force=True)
+        _joblib = joblib
+    return _joblib
+
+
+def parse_codec(codec: str = None):
+    """Parses a `<name>[:<level>]` codec specification (e.g. `zstd:3`)."""
+    if codec is None:
+        codec = DEFAULT_CODEC
+    name, _, level = str(codec).lower().partition(":")
+
+    msg = f"codec '{name}' not recognized. Allowed codecs: {list(CODECS.keys())}"
+    assert name in CODECS, msg
+    msg = f"`{name}` codec requires the `{'zstandard' if name == 'zstd' else name}` package."
+    assert REQUIREMENTS.get(name, True) is not None, msg
+
+    if name == "none":
+        return name, None
+    level = int(level) if level else CODECS[name]
+    msg = f"`{name}` compression level must be at least 1, use the `none` codec instead."
+    assert level >= 1, msg
+    return name, level
+
+
+def joblib_compress(codec: str = None):
+    """`compress` argument of `joblib.dump` for a codec specification."""
+    name, level = parse_codec(codec)
+    if name == "none":
+        return 0
+    return name, level
+
+
+def format_codec(codec: str = None):
+    name, level = parse_codec(codec)
+    return name if level is None else f"{name}:{level}"
+
+
+def detect_codec(file_path: Union[str, Path]):
+    """Codec of a file written by `joblib.dump`, detected from its magic number."""
+    with Path(file_path).open("rb") as fr:
+        header = fr.read(4)
+    for prefix, name in PREFIXES.items():
+        if header.startswith(prefix):
+            return name
+    return "none"
@@ -16,6 +16,17 @@ def configure(
     local_dir: Union[Path, str] = None,
     allocated_space: int = None,
     service_settings: dict = None,
+    index_ttl: int = None,
+    latency: float = None,
+    bandwidth: float = None,
+    validation: str = None,
+    validation_ttl: int = None,
+    eviction: str = None,
+    transfer_settings: dict = None,
+    codec: str = None,
+    mmap_mode: str = None,
+    storage: str = None,
+    object_cache_size: float = None,
 ) -> None:
     """Short summary.
 
@@ -31,6 +42,31 @@ def configure(
         Description of parameter `allocated_space`.
     service_settings : dict
         Description of parameter `service_settings`.
+    index_ttl : int
+        Number of seconds the remote key index is trusted before being re-listed.
+    latency : float
+        Seconds added to each request of the `local` and `memory` services.
+    bandwidth : float
+        Bandwidth in MB/s the transfers of the `local` and `memory` services are throttled to.
+    validation : str
+        Default validation policy of local files on `pull` (`always`, `etag`, `ttl` or `never`).
+    validation_ttl : int
+        Number of minutes a validated local file is trusted with the `ttl` policy.
+    eviction : str
+        Eviction policy of local files (`lru`, `lfu`, `gdsf` or `ttl[:<minutes>]`).
+    transfer_settings : dict
+        Transfer settings (`multipart_threshold`, `multipart_chunksize`, `max_concurrency`,
+        `max_pool_connections`, `use_threads`). Unset values scale with object sizes.
+    codec : str
+        Default compression codec used on `push` (`none`, `zlib`, `lz4` or `zstd`,
+        optionally followed by a level, e.g. `zstd:3`).
+    mmap_mode : str
+        Default memory mapping mode (`r` or `c`) of arrays loaded from local files.
+    storage : str
+        Default storage of pushed objects (`file`, `chunked` to deduplicate chunks or
+        `columnar` to store DataFrames as parquet).
+    object_cache_size : float
+        Size in MB of the in-memory cache of pulled objects, disabled when 0.
 
     Returns
     -------
@@ -43,6 +79,12 @@ def configure(
     # storing service config
     dm_config.add_section("service")
     dm_config["service"] = {"service": service, "name": storage_name}
+    if index_ttl is not None:
+        dm_config["service"]["index_ttl"] = str(index_ttl)
+    if latency is not None:
+        dm_config["service"]["latency"] = str(latency)
+    if bandwidth is not None:
+        dm_config["service"]["bandwidth"] = str(bandwidth)
     # storing local config
     dm_config.add_section("local")
     if local_dir is None:
@@ -55,6 +97,38 @@ def configure(
 
     if allocated_space is not None:
         dm_config["local"]["allocated_space"] = str(allocated_space)
+    if validation is not None:
+        dm_config["local"]["validation"] = validation
+    if validation_ttl is not None:
+        dm_config["local"]["validation_ttl"] = str(validation_ttl)
+    if eviction is not None:
+        dm_config["local"]["eviction"] = eviction
+
+    data_settings = {
+        "codec": codec,
+        "mmap_mode": mmap_mode,
+        "storage": storage,
+        "object_cache_size": object_cache_size,
+    }
+    data_settings = {
+        name: value for name, value in data_settings.items() if value is not None
+    }
+    if data_settings:
+        dm_config.add_section("data")
+        dm_config["data"] = {
+            name: str(value) for name, value in data_settings.items()
+        }
+
+    transfer_settings = {
+        name: value
+        for name, value in (transfer_settings or {}).items()
+        if value is not None
+    }
+    if transfer_settings:
+        dm_config.add_section("transfer")
+        dm_config["transfer"] = {
+            name: str(value) for name, value in transfer_settings.items()
+        }
 
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
     with (CONFIG_DIR / "config").open("w") as fw:
@@ -1 +1,5 @@
 from daman.data.registery import DataRegistery
+from daman.data.hash_cache import HashCache
+from daman.data.chunk_store import ChunkStore
+from daman.data.object_cache import ObjectCache
+from daman.data.locks import KeyLock, KeyLocks
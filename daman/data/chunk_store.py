@@ -0,0 +1,183 @@
+import os
+import threading
+from pathlib import Path
+
+
+class ChunkStore:
+    """Local content addressed store of the chunks of chunked keys.
+
+    Chunks are shared by every key referencing them and only deleted once no
+    local key references them anymore. The size of each chunk is charged to a
+    single key referencing it, so that the registered sizes add up to the disc usage.
+    """
+
+    def __init__(self, registery, folder: Path):
+        self.registery = registery
+        self.folder = Path(folder)
+        self._pid = None
+
+    @property
+    def connection(self):
+        connection = self.registery.connection
+        if self._pid != os.getpid():
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS chunk_refs ("
+                "key TEXT, hash TEXT, size INTEGER NOT NULL DEFAULT 0, "
+                "PRIMARY KEY (key, hash))"
+            )
+            existing = {
+                row[1] for row in connection.execute("PRAGMA table_info(chunk_refs)")
+            }
+            if "size" not in existing:
+                connection.execute(
+                    "ALTER TABLE chunk_refs ADD COLUMN size INTEGER NOT NULL DEFAULT 0"
+                )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS chunk_refs_hash ON chunk_refs (hash)"
+            )
+            self._pid = os.getpid()
+        return connection
+
+    def path(self, chunk_hash: str):
+        return self.folder / chunk_hash[:2] / chunk_hash
+
+    def has(self, chunk_hash: str):
+        return self.path(chunk_hash).exists()
+
+    def read(self, chunk_hash: str):
+        return self.path(chunk_hash).read_bytes()
+
+    def write(self, chunk_hash: str, content: bytes):
+        path = self.path(chunk_hash)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # unique per thread, the same chunk may be written by concurrent pulls
+        tmp_path = path.with_name(
+            f".daman-{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, path)
+
+    def _unused(self, hashes):
+        return [
+            chunk_hash
+            for chunk_hash in hashes
+            if self.connection.execute(
+                "SELECT 1 FROM chunk_refs WHERE hash = ? LIMIT 1", (chunk_hash,)
+            ).fetchone()
+            is None
+        ]
+
+    def _remove(self, hashes):
+        freed = 0
+        for chunk_hash in hashes:
+            path = self.path(chunk_hash)
+            if path.exists():
+                freed += path.stat().st_size
+                os.remove(path)
+        return freed
+
+    def _charged(self, hashes):
+        return {
+            row[0]
+            for chunk_hash in hashes
+            for row in self.connection.execute(
+                "SELECT hash FROM chunk_refs WHERE hash = ? AND size > 0 LIMIT 1",
+                (chunk_hash,),
+            )
+        }
+
+    def _recharge(self, sizes: dict):
+        """Charges the chunks of `sizes` still referenced to one of their keys."""
+        for chunk_hash, size in sizes.items():
+            row = self.connection.execute(
+                "SELECT key FROM chunk_refs WHERE hash = ? LIMIT 1", (chunk_hash,)
+            ).fetchone()
+            if row is None:
+                continue
+            self.connection.execute(
+                "UPDATE chunk_refs SET size = ? WHERE key = ? AND hash = ?",
+                (size, row[0], chunk_hash),
+            )
+            # the registered size of the key (if already registered) follows
+            self.connection.execute(
+                "UPDATE registery SET size = size + ? WHERE key = ?", (size, row[0])
+            )
+
+    def _drop(self, key: str):
+        sizes = {
+            row[0]: row[1]
+            for row in self.connection.execute(
+                "SELECT hash, size FROM chunk_refs WHERE key = ?", (key,)
+            )
+        }
+        self.connection.execute("DELETE FROM chunk_refs WHERE key = ?", (key,))
+        self.connection.execute(
+            "UPDATE registery SET size = size - ? WHERE key = ?",
+            (sum(sizes.values()), key),
+        )
+        return sizes
+
+    def charged(self, key: str):
+        """Bytes of the chunks charged to `key`."""
+        return self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM chunk_refs WHERE key = ?", (key,)
+        ).fetchone()[0]
+
+    def shared(self, key: str):
+        """Bytes charged to `key` of the chunks other keys reference as well."""
+        return self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM chunk_refs AS refs WHERE key = ? "
+            "AND EXISTS (SELECT 1 FROM chunk_refs WHERE hash = refs.hash AND key != ?)",
+            (key, key),
+        ).fetchone()[0]
+
+    def add_refs(self, key: str, chunks: list):
+        """Records the `[(hash, size)]` chunks of `key`, deleting those only its previous version used.
+
+        Returns the bytes charged to `key`, i.e. of the chunks no other key pays for.
+        """
+        with self.registery.transaction():
+            previous = self._drop(key)
+            charged = self._charged(chunk_hash for chunk_hash, _ in chunks)
+            sizes = {}
+            for chunk_hash, size in chunks:
+                if chunk_hash not in charged:
+                    sizes[chunk_hash] = size
+                    charged.add(chunk_hash)
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO chunk_refs VALUES (?, ?, ?)",
+                [
+                    (key, chunk_hash, sizes.get(chunk_hash, 0))
+                    for chunk_hash, _ in chunks
+                ],
+            )
+            self.connection.execute(
+                "UPDATE registery SET size = size + ? WHERE key = ?",
+                (sum(sizes.values()), key),
+            )
+            unused = self._unused(previous)
+            self._recharge(
+                {
+                    chunk_hash: size
+                    for chunk_hash, size in previous.items()
+                    if size and chunk_hash not in sizes and chunk_hash not in unused
+                }
+            )
+        self._remove(unused)
+        return sum(sizes.values())
+
+    def release(self, key: str):
+        """Drops the references of `key`, deleting the chunks no other key uses."""
+        with self.registery.transaction():
+            hashes = self._drop(key)
+            unused = self._unused(hashes)
+            self._recharge(
+                {
+                    chunk_hash: size
+                    for chunk_hash, size in hashes.items()
+                    if size and chunk_hash not in unused
+                }
+            )
+        return self._remove(unused)
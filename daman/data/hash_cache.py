@@ -0,0 +1,78 @@
+import os
+from pathlib import Path
+from typing import Union
+
+from daman.utils import hash_content, FAST_HASH
+from daman.metrics import METRICS
+
+
+class HashCache:
+    """Digests of local files, keyed on (path, size, mtime, inode).
+
+    Stored in the registery database so that an unchanged file is never hashed twice.
+    """
+
+    def __init__(self, registery):
+        self.registery = registery
+        self._pid = None
+
+    @property
+    def connection(self):
+        connection = self.registery.connection
+        if self._pid != os.getpid():
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS hashes ("
+                "path TEXT, algorithm TEXT, size INTEGER, mtime_ns INTEGER, "
+                "inode INTEGER, digest TEXT, PRIMARY KEY (path, algorithm))"
+            )
+            self._pid = os.getpid()
+        return connection
+
+    def get(self, file_path: Union[str, Path], algorithms: tuple = ("md5", FAST_HASH)):
+        file_path = str(Path(file_path).resolve())
+        stat = os.stat(file_path)
+        signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+        hashes = {}
+        for algorithm, size, mtime_ns, inode, digest in self.connection.execute(
+            "SELECT algorithm, size, mtime_ns, inode, digest FROM hashes WHERE path = ?",
+            (file_path,),
+        ):
+            if algorithm in algorithms and (size, mtime_ns, inode) == signature:
+                hashes[algorithm] = digest
+
+        missing = tuple(
+            algorithm for algorithm in algorithms if algorithm not in hashes
+        )
+        if missing:
+            # all missing digests are computed in a single pass over the file
+            with METRICS.timed("hash"):
+                computed = hash_content(file_path=file_path, algorithms=missing)
+            METRICS.increment("hashed_bytes", stat.st_size)
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (file_path, algorithm, *signature, digest)
+                    for algorithm, digest in computed.items()
+                ],
+            )
+            hashes.update(computed)
+        return hashes
+
+    def store(self, file_path: Union[str, Path], hashes: dict):
+        """Records digests computed elsewhere (e.g. while writing the file)."""
+        file_path = str(Path(file_path).resolve())
+        stat = os.stat(file_path)
+        signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (file_path, algorithm, *signature, digest)
+                for algorithm, digest in hashes.items()
+            ],
+        )
+
+    def discard(self, file_path: Union[str, Path]):
+        self.connection.execute(
+            "DELETE FROM hashes WHERE path = ?", (str(Path(file_path).resolve()),)
+        )
@@ -0,0 +1,103 @@
+import os
+import time
+import hashlib
+from pathlib import Path
+from typing import Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+DEFAULT_POLL = 0.05  # seconds between attempts to take a busy lock
+STALE_LOCK_AGE = 6 * 3600  # seconds, exclusive lock files only
+
+
+class KeyLock:
+    """Exclusive lock shared by the processes (and threads) of the machine, held on a lock file.
+
+    Uses `fcntl.flock`, released by the system when its holder dies. Where `fcntl`
+    is not available the lock file is created exclusively instead, and considered
+    stale (e.g. left by a killed process) after `stale_after` seconds.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        poll: float = DEFAULT_POLL,
+        stale_after: float = STALE_LOCK_AGE,
+    ):
+        self.path = Path(path)
+        self.poll = poll
+        self.stale_after = stale_after
+        self._fd = None
+
+    @property
+    def locked(self):
+        return self._fd is not None
+
+    def acquire(self, timeout: float = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._try_acquire(blocking=deadline is None):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"`{self.path}` still locked after {timeout}s.")
+            time.sleep(self.poll)
+
+    def _try_acquire(self, blocking: bool):
+        if fcntl is not None:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                os.close(fd)
+                return False
+            self._fd = fd
+            return True
+
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            self._break_stale()
+            return False
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def _break_stale(self):
+        try:
+            if time.time() - os.stat(self.path).st_mtime > self.stale_after:
+                os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        if fcntl is not None:
+            # the lock file is kept, removing it would let another process lock a new one
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        else:
+            os.close(fd)
+            os.remove(self.path)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class KeyLocks:
+    """Lock files of the keys of a data folder, one per key."""
+
+    def __init__(self, folder: Union[str, Path]):
+        self.folder = Path(folder)
+
+    def get(self, key: str):
+        self.folder.mkdir(parents=True, exist_ok=True)
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return KeyLock(self.folder / f"{name}.lock")
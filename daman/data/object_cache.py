@@ -0,0 +1,70 @@
+from threading import Lock
+from collections import OrderedDict
+
+
+class ObjectCache:
+    """In-memory LRU cache of deserialised objects, bounded by an approximate size in bytes.
+
+    Sizes are estimated by the caller (e.g. the size of the file an object was
+    loaded from), a `max_size` of 0 disables the cache.
+    """
+
+    def __init__(self, max_size: float = 0):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._items = OrderedDict()
+
+    def get(self, key: str):
+        """Cached value of `key`, `None` when not cached."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: str, value, size: float):
+        with self._lock:
+            self._discard(key)
+            if size > self.max_size:
+                return
+            self._items[key] = (value, size)
+            self.size += size
+            while self.size > self.max_size:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.size -= evicted_size
+
+    def _discard(self, key: str):
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.size -= item[1]
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "items": len(self._items),
+            "size": self.size,
+            "max_size": self.max_size,
+        }
@@ -1,52 +1,299 @@
+import os
 import orjson
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime
+from logging import getLogger
+from contextlib import contextmanager
+from typing import Union
 
 from daman import CONFIG_DIR
+from daman.eviction import EVICTION_POLICIES
+
+
+logger = getLogger(__name__)
+
+LEGACY_REGISTERY_PATH = CONFIG_DIR / "data_registery.json"
+
+# column name -> sqlite declaration. New columns are added to existing databases on connection.
+COLUMNS = {
+    "path": "TEXT NOT NULL",
+    "used": "INTEGER NOT NULL DEFAULT 0",
+    "created_at": "TEXT",
+    "last_used": "TEXT",
+    "size": "INTEGER NOT NULL DEFAULT 0",
+    "persist": "INTEGER NOT NULL DEFAULT 0",
+    "etag": "TEXT",
+    "validated_at": "TEXT",
+    "codec": "TEXT",
+    "storage": "TEXT",
+    # eviction clock when the file was last used, see `GDSFPolicy`
+    "inflation": "REAL NOT NULL DEFAULT 0",
+}
+BOOL_COLUMNS = {"persist"}
+INDEXED_COLUMNS = ["last_used", "used", "persist", "size"]
+PAGE_SIZE = 256  # rows fetched at once by `ordered`
+
+
+def _to_sql(column, value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if column in BOOL_COLUMNS and value is not None:
+        return int(bool(value))
+    return value
+
+
+def _from_sql(column, value):
+    if column in BOOL_COLUMNS and value is not None:
+        return bool(value)
+    return value
 
 
 class DataRegistery:
-    def __init__(self):
-        self.registery_path = CONFIG_DIR / "data_registery.json"
+    """SQLite registery of the files stored locally.
 
-    def read(self):
-        if self.registery_path.exists():
-            with self.registery_path.open("rb") as fr:
-                return orjson.loads(fr.read())
-        return {}
+    The database runs in WAL mode so that several processes can read while one
+    writes, every update touches a single row and multi-step changes can be
+    grouped with `transaction`.
+    """
 
-    def write(self, registery):
-        with self.registery_path.open("wb") as fw:
-            fw.write(orjson.dumps(registery))
+    def __init__(self, registery_path: Union[str, Path] = None):
+        if registery_path is None:
+            registery_path = CONFIG_DIR / "data_registery.db"
+        self.registery_path = Path(registery_path)
+        self._local = threading.local()
 
-    def __getitem__(self, key):
-        registery = self.read()
+    @property
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+        # sqlite connections must not be shared across forked processes
+        if connection is None or self._local.pid != os.getpid():
+            connection = self._connect()
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
 
-        return registery[key]
+    def _connect(self):
+        self.registery_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(
+            str(self.registery_path), timeout=30, isolation_level=None
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        # rows replaced by INSERT OR REPLACE must fire the delete triggers
+        connection.execute("PRAGMA recursive_triggers=ON")
+        with self._transaction(connection):
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS registery (key TEXT PRIMARY KEY, "
+                f"{', '.join(f'{column} {declaration}' for column, declaration in COLUMNS.items())})"
+            )
+            existing = {
+                row[1] for row in connection.execute("PRAGMA table_info(registery)")
+            }
+            for column, declaration in COLUMNS.items():
+                if column not in existing:
+                    if "NOT NULL" in declaration and "DEFAULT" not in declaration:
+                        declaration = f"{declaration} DEFAULT ''"
+                    connection.execute(
+                        f"ALTER TABLE registery ADD COLUMN {column} {declaration}"
+                    )
+            for column in INDEXED_COLUMNS:
+                connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS registery_{column} ON registery ({column})"
+                )
+            # evictable (not persisted) files are read in the order of each policy
+            orders = {policy.order: name for name, policy in EVICTION_POLICIES.items()}
+            for order, name in orders.items():
+                connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS registery_evict_{name} "
+                    f"ON registery (persist, {order})"
+                )
+            self._create_usage(connection)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS clock "
+                "(id INTEGER PRIMARY KEY CHECK (id = 0), value REAL NOT NULL)"
+            )
+            connection.execute("INSERT OR IGNORE INTO clock VALUES (0, 0)")
+            self._migrate(connection)
+        return connection
 
-    def __setitem__(self, key, value):
-        registery = self.read()
+    @staticmethod
+    def _create_usage(connection):
+        # total size of the registered files, kept up to date by triggers
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS usage "
+            "(id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER NOT NULL)"
+        )
+        connection.execute(
+            "INSERT OR IGNORE INTO usage VALUES "
+            "(0, (SELECT COALESCE(SUM(size), 0) FROM registery))"
+        )
+        triggers = {
+            "insert": ("AFTER INSERT", "size + NEW.size"),
+            "delete": ("AFTER DELETE", "size - OLD.size"),
+            "update": ("AFTER UPDATE OF size", "size - OLD.size + NEW.size"),
+        }
+        for name, (event, size) in triggers.items():
+            connection.execute(
+                f"CREATE TRIGGER IF NOT EXISTS registery_usage_{name} {event} ON registery "
+                f"BEGIN UPDATE usage SET size = {size} WHERE id = 0; END"
+            )
+
+    def _migrate(self, connection):
+        if not LEGACY_REGISTERY_PATH.exists():
+            return
+        logger.info(f"migrating `{LEGACY_REGISTERY_PATH}` to `{self.registery_path}`.")
+        with LEGACY_REGISTERY_PATH.open("rb") as fr:
+            registery = orjson.loads(fr.read())
+        for key, value in registery.items():
+            self._upsert(connection, key, value)
+        LEGACY_REGISTERY_PATH.rename(
+            LEGACY_REGISTERY_PATH.with_suffix(".json.migrated")
+        )
+
+    @staticmethod
+    @contextmanager
+    def _transaction(connection):
+        if connection.in_transaction:
+            yield connection
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        else:
+            connection.execute("COMMIT")
+
+    def transaction(self):
+        return self._transaction(self.connection)
 
-        registery[key] = value
-        self.write(registery)
+    @staticmethod
+    def _upsert(connection, key, value):
+        columns = [column for column in COLUMNS if column in value]
+        connection.execute(
+            f"INSERT OR REPLACE INTO registery (key, {', '.join(columns)}) "
+            f"VALUES (?{', ?' * len(columns)})",
+            [key] + [_to_sql(column, value[column]) for column in columns],
+        )
+
+    def _row_to_item(self, row):
+        return {column: _from_sql(column, value) for column, value in zip(COLUMNS, row)}
+
+    def __getitem__(self, key):
+        row = self.connection.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM registery WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return self._row_to_item(row)
+
+    def __setitem__(self, key, value):
+        if "inflation" not in value:
+            value = {**value, "inflation": self.clock}
+        self._upsert(self.connection, key, value)
 
     def __delitem__(self, key):
-        registery = self.read()
+        cursor = self.connection.execute("DELETE FROM registery WHERE key = ?", (key,))
+        if cursor.rowcount == 0:
+            raise KeyError(key)
 
-        del registery[key]
+    def update(self, key: str, **fields):
+        columns = list(fields)
+        cursor = self.connection.execute(
+            f"UPDATE registery SET {', '.join(f'{column} = ?' for column in columns)} "
+            "WHERE key = ?",
+            [_to_sql(column, fields[column]) for column in columns] + [key],
+        )
+        if cursor.rowcount == 0:
+            raise KeyError(key)
 
-        self.write(registery)
+    def touch(self, key: str, persist: bool = None):
+        """Records a use of `key` (usage count, last use date and eviction clock)."""
+        fields = {"last_used": datetime.now()}
+        if persist is not None:
+            fields["persist"] = persist
+        columns = list(fields)
+        cursor = self.connection.execute(
+            "UPDATE registery SET used = used + 1, "
+            "inflation = (SELECT value FROM clock WHERE id = 0), "
+            f"{', '.join(f'{column} = ?' for column in columns)} WHERE key = ?",
+            [_to_sql(column, fields[column]) for column in columns] + [key],
+        )
+        if cursor.rowcount == 0:
+            raise KeyError(key)
 
     @property
     def keys(self):
-        return list(self.read().keys())
+        return [row[0] for row in self.connection.execute("SELECT key FROM registery")]
 
     @property
     def values(self):
-        return list(self.read().values())
+        return [value for _, value in self.items]
 
     @property
     def items(self):
-        return list(self.read().items())
+        return [
+            (row[0], self._row_to_item(row[1:]))
+            for row in self.connection.execute(
+                f"SELECT key, {', '.join(COLUMNS)} FROM registery"
+            )
+        ]
+
+    def ordered(self, order: str, where: str = None, params: tuple = ()):
+        """Yields `(key, item)` sorted by the `order` SQL expression, as rows are read.
+
+        The order of each eviction policy is indexed for the files not persisted
+        (`persist = 0`). The generator must be closed once no longer iterated, so
+        that its statement is not left open.
+        """
+        query = f"SELECT key, {', '.join(COLUMNS)} FROM registery"
+        if where is not None:
+            query += f" WHERE {where}"
+        cursor = self.connection.execute(f"{query} ORDER BY {order}", params)
+        try:
+            rows = cursor.fetchmany(PAGE_SIZE)
+            while rows:
+                for row in rows:
+                    yield row[0], self._row_to_item(row[1:])
+                rows = cursor.fetchmany(PAGE_SIZE)
+        finally:
+            cursor.close()
+
+    @property
+    def clock(self):
+        """Eviction clock, raised as files are evicted."""
+        return self.connection.execute(
+            "SELECT value FROM clock WHERE id = 0"
+        ).fetchone()[0]
+
+    def raise_clock(self, value: float):
+        self.connection.execute(
+            "UPDATE clock SET value = MAX(value, ?) WHERE id = 0", (value,)
+        )
+
+    @property
+    def usage(self):
+        """Total size in bytes of the registered files."""
+        return self.connection.execute(
+            "SELECT size FROM usage WHERE id = 0"
+        ).fetchone()[0]
+
+    def recompute_usage(self):
+        with self.transaction():
+            self.connection.execute(
+                "UPDATE usage SET size = "
+                "(SELECT COALESCE(SUM(size), 0) FROM registery) WHERE id = 0"
+            )
+        return self.usage
 
     def __contains__(self, item):
-        registery = self.read()
-        return item in registery
+        row = self.connection.execute(
+            "SELECT 1 FROM registery WHERE key = ?", (item,)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM registery").fetchone()[0]
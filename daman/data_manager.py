@@ -1,52 +1,156 @@
+import io
 import os
-import joblib
-import psutil
-import pandas as pd
+import math
+import orjson
+import tempfile
 from io import BytesIO
 from logging import getLogger
 from pathlib import Path
+from threading import Event, RLock, get_ident
+from contextlib import contextmanager
+from collections import namedtuple
+from typing import Union, Iterable
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    as_completed as futures_completed,
+    wait as futures_wait,
+)
 from os.path import getsize
-from datetime import datetime
+from functools import partial
+from fnmatch import fnmatchcase
+from itertools import chain, islice
+from weakref import WeakKeyDictionary
+from datetime import datetime, timedelta
 
-from daman.utils import dir_size
-from configparser import ConfigParser
-
-from daman.configure import CONFIG_DIR
-from daman.services import PROVIDERS
-from daman.data import DataRegistery
+from daman.utils import HashingWriter
+from daman.session import Session
+from daman.metrics import METRICS
+from daman.data import ObjectCache
+from daman.services import INTERNAL_PREFIX, RangeReader
+from daman.services.resumable import (
+    ResumableDownload,
+    clear_stale_partials,
+    clear_stale_tmp_files,
+)
+from daman.services.transfer import read_transfer_settings, transfer_settings
+from daman.chunking import (
+    ChunkedReader,
+    chunk_hash,
+    dump_manifest,
+    is_manifest,
+    iter_chunks,
+    load_manifest,
+)
+from daman.columnar import PARQUET_MAGIC, is_parquet, read_columnar, write_columnar
+from daman.eviction import DEFAULT_EVICTION, get_policy
+from daman.compression import (
+    DEFAULT_CODEC,
+    detect_codec,
+    format_codec,
+    get_joblib,
+    joblib_compress,
+    parse_codec,
+)
 
 
 logger = getLogger(__name__)
 
+# how local files are checked against their remote version on `pull`
+VALIDATION_POLICIES = ("always", "etag", "ttl", "never")
+DEFAULT_VALIDATION_TTL = 60  # minutes
+DEFAULT_MAX_WORKERS = 8
+
+# meta information is stored apart from the data, inlined in the object metadata when small
+META_PREFIX = f"{INTERNAL_PREFIX}meta/"
+LOCAL_META_FOLDER = ".meta"
+INLINE_META_SIZE = 1024  # bytes
+TMP_SCAN_INTERVAL = 3600  # seconds between scans for stale temporary files
+
+# memory mapping modes that never modify the cached files
+MMAP_MODES = ("r", "c")
+
+# chunked objects are stored as a manifest under their key and content addressed chunks
+STORAGES = ("file", "chunked", "columnar")
+DEFAULT_STORAGE = "file"
+CHUNK_PREFIX = f"{INTERNAL_PREFIX}chunks/"
+
+# summary columns, and the column of each available sort
+SUMMARY_COLUMNS = ("key", "local", "remote", "size (MB)")
+SUMMARY_SORTS = {
+    "key": "key",
+    "size": "size (MB)",
+    "local": "local",
+    "remote": "remote",
+}
+
+BatchResult = namedtuple("BatchResult", ["key", "value", "error"])
+
+
+def _is_plain_json(value: object):
+    """Whether `value` is read back from JSON unchanged, types included."""
+    if value is None or type(value) in (str, bool, int):
+        return True
+    if type(value) is float:
+        return math.isfinite(value)
+    if type(value) is list:
+        return all(_is_plain_json(item) for item in value)
+    if type(value) is dict:
+        return all(
+            type(name) is str and _is_plain_json(item) for name, item in value.items()
+        )
+    return False
+
 
 class DataManager:
+    def __init__(
+        self,
+        config_path: Union[str, Path] = None,
+        async_concurrency: int = DEFAULT_MAX_WORKERS,
+        object_cache_size: float = None,
+    ):
+        self.session = Session(config_path=config_path)
+        self.async_concurrency = async_concurrency
+        self.object_cache_size = object_cache_size
+        self._object_cache = None
+        self._disc_lock = RLock()
+        self._eviction_policies = {}
+        self._tmp_scanned_at = None
+        self._semaphores = WeakKeyDictionary()
+
     @property
     def config(self):
-        config = ConfigParser()
-        config.read(CONFIG_DIR / "config")
-        return config
+        return self.session.config
 
     @property
     def data_folder(self):
-        config = self.config
-        d_folder = Path(config["local"]["data_dir"])
-        if not d_folder.exists():
-            d_folder.mkdir(parents=True, exist_ok=True)
-        return d_folder
+        return self.session.data_folder
 
     @property
     def registery(self):
-        return DataRegistery()
+        return self.session.registery
 
     @property
     def service(self):
-        req_service = self.config["service"]["service"]
-        if req_service in PROVIDERS:
-            return PROVIDERS[req_service](config=self.config)
-        else:
-            raise KeyError(
-                f"service `{req_service}` requested is not available among provided services."
-            )
+        return self.session.service
+
+    @property
+    def object_cache(self):
+        if self._object_cache is None:
+            size = self.object_cache_size
+            if size is None:
+                size = self.config.getfloat("data", "object_cache_size", fallback=0)
+            self._object_cache = ObjectCache(max_size=size * 2 ** 20)
+        return self._object_cache
+
+    @property
+    def cache_stats(self):
+        return self.object_cache.stats
+
+    @property
+    def stats(self):
+        """Counters and per-phase timings of the process, see `daman.metrics`."""
+        return {**METRICS.stats(), "object_cache": self.cache_stats}
 
     def pull(
         self,
@@ -54,49 +158,449 @@ class DataManager:
         force: bool = False,
         persist: bool = None,
         memory_only: bool = False,
+        validation: str = None,
+        transfer: dict = None,
+        mmap_mode: str = None,
+        columns: list = None,
+        filters: object = None,
     ):
-        msg = f"key '{key}' not found"
-        assert key in self.service.keys, msg
+        with METRICS.timed("pull", key=key):
+            if columns is not None or filters is not None:
+                return self._pull_columnar(
+                    key,
+                    columns=columns,
+                    filters=filters,
+                    force=force,
+                    persist=persist,
+                    validation=validation,
+                )
+
+            value = self._cached(
+                key, force=force, persist=persist, mmap_mode=mmap_mode
+            )
+            if value is not None:
+                return value
+
+            if key in self.registery and not force:
+                value = self._load_local(
+                    key=key,
+                    persist=persist,
+                    validation=validation,
+                    mmap_mode=mmap_mode,
+                )
+            else:
+                msg = f"key '{key}' not found"
+                with METRICS.timed("exists", key=key):
+                    assert self.service.exists(key), msg
+
+                value = self._fetch(
+                    key=key,
+                    persist=persist,
+                    memory_only=memory_only,
+                    transfer=transfer,
+                    mmap_mode=mmap_mode,
+                )
+            return self._cache(key, value, mmap_mode=mmap_mode)
+
+    def _pull_columnar(
+        self,
+        key: str,
+        columns: list,
+        filters: object,
+        force: bool,
+        persist: bool = None,
+        validation: str = None,
+    ):
+        """Reads `columns` of the rows matching `filters` of a key stored as columns.
+
+        The local file is read when available, otherwise only the needed parts of
+        the remote object are fetched through ranged requests (nothing is stored
+        locally). Projections are never cached in memory.
+        """
         if key in self.registery and not force:
-            if persist is not None:
-                self.registery[key]["persist"] = persist
-            self.registery[key]["used"] += 1
-            self.registery[key]["last_used"] = datetime.now()
-            file_path = Path(self.registery[key]["path"])
-            is_valid = self.service.check_valid(key=key, file_path=file_path)
-            if not is_valid:
+            return self._load_local(
+                key=key,
+                persist=persist,
+                validation=validation,
+                columns=columns,
+                filters=filters,
+            )
+
+        msg = f"key '{key}' not found"
+        with METRICS.timed("exists", key=key):
+            assert self.service.exists(key), msg
+        msg = f"`{key}` is not stored as columns, `columns` and `filters` cannot be used."
+        assert self.service.entry(key).get("storage") == "columnar", msg
+
+        METRICS.increment("local_misses", key=key)
+        with METRICS.timed("download", key=key):
+            with RangeReader(self.service, key) as reader:
+                return read_columnar(reader, columns=columns, filters=filters)
+
+    def _cacheable(self, mmap_mode: str = None):
+        # memory mapped arrays are already cheap to load
+        if mmap_mode is None:
+            mmap_mode = self.mmap_mode
+        return self.object_cache.max_size > 0 and mmap_mode is None
+
+    def _cached(
+        self, key: str, force: bool, persist: bool = None, mmap_mode: str = None
+    ):
+        """Value of `key` held by the object cache, without validating it again."""
+        if not self._cacheable(mmap_mode):
+            return None
+        if force:
+            self.object_cache.invalidate(key)
+            return None
+        value = self.object_cache.get(key)
+        METRICS.increment(
+            "object_cache_misses" if value is None else "object_cache_hits", key=key
+        )
+        if value is not None and persist is not None and key in self.registery:
+            self.registery.touch(key, persist=persist)
+        return value
+
+    def _cache(self, key: str, value: tuple, mmap_mode: str = None):
+        if self._cacheable(mmap_mode):
+            # the size of the serialised object approximates its size in memory
+            item = self.registery[key] if key in self.registery else None
+            size = item["size"] if item is not None else self.service.file_size(key)
+            self.object_cache.put(key, value, size=size)
+        return value
+
+    def _load(
+        self,
+        file_path: Path,
+        mmap_mode: str = None,
+        columns: list = None,
+        filters: object = None,
+    ):
+        with METRICS.timed("load"):
+            return self._load_file(
+                file_path, mmap_mode=mmap_mode, columns=columns, filters=filters
+            )
+
+    def _load_file(
+        self,
+        file_path: Path,
+        mmap_mode: str = None,
+        columns: list = None,
+        filters: object = None,
+    ):
+        if is_parquet(file_path):
+            return read_columnar(file_path, columns=columns, filters=filters)
+        msg = f"`{file_path.name}` is not stored as columns, `columns` and `filters` cannot be used."
+        assert columns is None and filters is None, msg
+        if is_manifest(file_path):
+            return self._load_chunked(file_path, mmap_mode=mmap_mode)
+        if mmap_mode is None:
+            mmap_mode = self.mmap_mode
+        if mmap_mode is not None:
+            msg = f"mmap_mode '{mmap_mode}' not supported. Allowed modes: {list(MMAP_MODES)}"
+            assert mmap_mode in MMAP_MODES, msg
+            if detect_codec(file_path) != "none":
                 logger.warning(
-                    f"local '{key}' file doesn't match remote version. Please pull it again using `force`."
+                    f"`{file_path.name}` is compressed and cannot be memory mapped."
                 )
-            logger.info(f"data `{key}` available locally.")
-            obj = joblib.load(file_path)
-            return obj["data"], obj["meta"]
+                mmap_mode = None
+        obj = get_joblib().load(file_path, mmap_mode=mmap_mode)
+        return obj["data"], obj["meta"]
+
+    @staticmethod
+    def _load_buffer(buffer: BytesIO):
+        """Loads an object downloaded in memory, stored as columns or not."""
+        magic = buffer.read(len(PARQUET_MAGIC))
+        buffer.seek(0)
+        if magic == PARQUET_MAGIC:
+            return read_columnar(buffer)
+        obj = get_joblib().load(buffer)
+        return obj["data"], obj["meta"]
+
+    def _load_chunked(self, file_path: Path, mmap_mode: str = None):
+        if mmap_mode is not None:
+            logger.warning(
+                f"`{file_path.name}` is stored as chunks and cannot be memory mapped."
+            )
+        manifest = load_manifest(file_path.read_bytes())
+        store = self.session.chunk_store
+        reader = ChunkedReader(
+            [store.path(chunk) for chunk, _ in manifest["chunks"]],
+            [size for _, size in manifest["chunks"]],
+        )
+        with io.BufferedReader(reader) as fr:
+            obj = get_joblib().load(fr)
+        return obj["data"], obj["meta"]
 
+    def _load_local(
+        self,
+        key: str,
+        persist: bool = None,
+        validation: str = None,
+        mmap_mode: str = None,
+        columns: list = None,
+        filters: object = None,
+    ):
+        METRICS.increment("local_hits", key=key)
+        self.registery.touch(key, persist=persist)
+        item = self.registery[key]
+        file_path = Path(item["path"])
+        with METRICS.timed("validate", key=key):
+            is_valid = self.check_valid(key=key, item=item, validation=validation)
+        if not is_valid:
+            logger.warning(
+                f"local '{key}' file doesn't match remote version. Please pull it again using `force`."
+            )
+        logger.info(f"data `{key}` available locally.")
+        return self._load(
+            file_path, mmap_mode=mmap_mode, columns=columns, filters=filters
+        )
+
+    def _fetch(
+        self,
+        key: str,
+        persist: bool = None,
+        memory_only: bool = False,
+        transfer: dict = None,
+        reserve: bool = True,
+        mmap_mode: str = None,
+    ):
         # download file
+        METRICS.increment("local_misses", key=key)
         if persist is None:
             persist = False
 
+        if self.service.entry(key).get("storage") == "chunked":
+            return self._fetch_chunked(
+                key=key,
+                persist=persist,
+                memory_only=memory_only,
+                transfer=transfer,
+                reserve=reserve,
+                mmap_mode=mmap_mode,
+            )
+
         if memory_only:
             with BytesIO() as buffer:
                 buffer.seek(0)
-                self.service.download(key=key, buffer=buffer)
-                obj = joblib.load(buffer)
-                return obj["data"], obj["meta"]
+                with METRICS.timed("download", key=key):
+                    self.service.download(key=key, buffer=buffer, transfer=transfer)
+                buffer.seek(0)
+                with METRICS.timed("load"):
+                    return self._load_buffer(buffer)
         else:
+            file_path = self._download_file(
+                key=key, persist=persist, transfer=transfer, reserve=reserve
+            )
+            return self._load(file_path, mmap_mode=mmap_mode)
+
+    def _download_file(
+        self,
+        key: str,
+        persist: bool,
+        transfer: dict = None,
+        reserve: bool = True,
+        cancel: Event = None,
+    ):
+        """Downloads `key` to the data folder and registers it, returns its local path.
+
+        The file is downloaded under a temporary name then atomically moved, so that
+        it is never read partially written. Files larger than the multipart threshold
+        are downloaded in parts, resumed by the next pull when interrupted.
+        """
+        with self._single_flight(key, persist=persist) as installed:
+            if installed is not None:
+                return installed
             logger.info(f"downloading `{key}` file.")
-            self.clear_disc(key=key)
-            file_path = (self.data_folder / key).resolve()
-            self.service.download(key=key, file_path=file_path)
-            self.registery[key] = {
-                "path": str(file_path),
-                "used": 1,
-                "created_at": datetime.now(),
-                "last_used": datetime.now(),
-                "size": getsize(str(file_path)),
-                "persist": persist,
-            }
-            obj = joblib.load(file_path)
-            return obj["data"], obj["meta"]
+            if reserve:
+                self.clear_disc(key=key)
+            file_path = self._local_path(key)
+            size = self.service.file_size(key)
+            settings = transfer_settings(
+                size=size,
+                settings={**read_transfer_settings(self.config), **(transfer or {})},
+            )
+            with METRICS.timed("download", key=key):
+                if size > settings["multipart_threshold"] * 2 ** 20:
+                    ResumableDownload(
+                        self.service,
+                        key=key,
+                        folder=self.session.partial_folder,
+                        part_size=settings["multipart_chunksize"] * 2 ** 20,
+                        max_concurrency=settings["max_concurrency"],
+                    ).run(file_path, cancel=cancel)
+                else:
+                    self._download_atomic(
+                        key, file_path=file_path, transfer=transfer, cancel=cancel
+                    )
+            self._register(key=key, file_path=file_path, persist=persist)
+            return file_path
+
+    def _download_atomic(
+        self, key: str, file_path: Path, transfer: dict = None, cancel: Event = None
+    ):
+        tmp_path = self._tmp_path(file_path)
+        try:
+            self.service.download(
+                key=key, file_path=tmp_path, transfer=transfer, cancel=cancel
+            )
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            self._discard_tmp(tmp_path)
+            raise
+
+    @contextmanager
+    def _single_flight(self, key: str, persist: bool = False):
+        """Holds the lock file of `key` while it is downloaded and installed.
+
+        Processes (and threads) missing the same key thus download it only once: the
+        others wait for the lock, then reuse the file installed meanwhile. Yields its
+        local path in that case, `None` when `key` must be downloaded.
+        """
+        installed_at = self._installed_at(key)
+        lock = self.session.locks.get(key)
+        with METRICS.timed("lock_wait", key=key):
+            lock.acquire()
+        try:
+            item = self.registery[key] if key in self.registery else None
+            if item is not None and item["created_at"] != installed_at:
+                METRICS.increment("single_flight_hits", key=key)
+                logger.info(f"`{key}` was installed meanwhile, reusing it.")
+                if persist:
+                    self.registery.update(key, persist=True)
+                yield Path(item["path"])
+            else:
+                yield None
+        finally:
+            lock.release()
+
+    def _installed_at(self, key: str):
+        try:
+            return self.registery[key]["created_at"]
+        except KeyError:
+            return None
+
+    def _fetch_chunked(
+        self,
+        key: str,
+        persist: bool,
+        memory_only: bool = False,
+        transfer: dict = None,
+        reserve: bool = True,
+        load: bool = True,
+        mmap_mode: str = None,
+    ):
+        """Downloads the manifest of `key`, then only the chunks missing locally."""
+        with BytesIO() as buffer, METRICS.timed("download", key=key):
+            self.service.download(key=key, buffer=buffer, transfer=transfer)
+            content = buffer.getvalue()
+        manifest = load_manifest(content)
+        store = self.session.chunk_store
+
+        if memory_only:
+            with BytesIO() as buffer:
+                for chunk, _ in manifest["chunks"]:
+                    buffer.write(
+                        store.read(chunk)
+                        if store.has(chunk)
+                        else self._download_chunk(chunk)
+                    )
+                buffer.seek(0)
+                obj = get_joblib().load(buffer)
+                return obj["data"], obj["meta"]
+
+        with self._single_flight(key, persist=persist) as installed:
+            if installed is not None:
+                if not load:
+                    return installed
+                return self._load_chunked(installed, mmap_mode=mmap_mode)
+
+            # referenced before evicting so that the chunks it shares are kept
+            charged = store.add_refs(key, manifest["chunks"])
+            file_path = self._local_path(key)
+            try:
+                if reserve:
+                    # only the manifest and the chunks no local key holds take space
+                    self.clear_disc(
+                        space=(len(content) + charged) / 2 ** 20, keep=[key]
+                    )
+                missing = list(
+                    {chunk for chunk, _ in manifest["chunks"] if not store.has(chunk)}
+                )
+                logger.info(
+                    f"downloading `{key}` file, {len(missing)} of {len(manifest['chunks'])} chunks missing locally."
+                )
+                for result in self._run_batch(
+                    lambda chunk: store.write(chunk, self._download_chunk(chunk)),
+                    missing,
+                    max_workers=DEFAULT_MAX_WORKERS,
+                    as_completed=True,
+                ):
+                    if result.error is not None:
+                        raise result.error
+                self._write_atomic(file_path, content)
+            except BaseException:
+                self._release_chunked(key)
+                raise
+
+            self._register(
+                key=key,
+                file_path=file_path,
+                persist=persist,
+                size=len(content) + store.charged(key),
+                codec=manifest["codec"],
+                storage="chunked",
+            )
+            if not load:
+                return file_path
+            return self._load_chunked(file_path, mmap_mode=mmap_mode)
+
+    def _download_chunk(self, chunk: str):
+        with BytesIO() as buffer:
+            self.service.download(key=CHUNK_PREFIX + chunk, buffer=buffer)
+            content = buffer.getvalue()
+        msg = f"chunk `{chunk}` is corrupted."
+        assert chunk_hash(content) == chunk, msg
+        return content
+
+    @staticmethod
+    def _tmp_path(file_path: Path):
+        # unique per process and thread, next to the file it is then moved to
+        return file_path.with_name(
+            f".daman-{file_path.name}.{os.getpid()}.{get_ident()}.tmp"
+        )
+
+    def _write_atomic(self, file_path: Path, content: bytes):
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._tmp_path(file_path)
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, file_path)
+
+    def _register(
+        self,
+        key: str,
+        file_path: Path,
+        persist: bool,
+        keep_meta: bool = False,
+        **fields,
+    ):
+        """Registers the local file of `key`, whose meta copy is dropped unless `keep_meta`."""
+        entry = self.service.entry(key)
+        self.registery[key] = {
+            "path": str(file_path),
+            "used": 1,
+            "created_at": datetime.now(),
+            "last_used": datetime.now(),
+            "size": getsize(str(file_path)),
+            "persist": persist,
+            "etag": entry["etag"],
+            "validated_at": datetime.now(),
+            "codec": detect_codec(file_path),
+            "storage": entry.get("storage") or DEFAULT_STORAGE,
+            **fields,
+        }
+        if not keep_meta:
+            # the copy may belong to the previous version
+            self._discard_local_meta(key)
 
     def push(
         self,
@@ -106,9 +610,237 @@ class DataManager:
         local: bool = True,
         force: bool = False,
         persist: bool = False,
+        transfer: dict = None,
+        codec: str = None,
+        mmap: bool = False,
+        storage: str = None,
     ):
-        obj = {"data": obj, "meta": meta}
-        if key in self.service.keys:
+        self._check_key_available(key=key, force=force)
+        self.object_cache.invalidate(key)
+        codec = self._push_codec(codec=codec, mmap=mmap)
+        storage = self._push_storage(storage=storage, mmap=mmap)
+        if storage == "chunked":
+            return self._push_chunked(
+                obj,
+                key=key,
+                meta=meta,
+                local=local,
+                persist=persist,
+                transfer=transfer,
+                codec=codec,
+            )
+
+        file_path = self._dump(
+            obj=obj, meta=meta, key=key, local=local, codec=codec, storage=storage
+        )
+        self._upload(
+            key=key,
+            file_path=file_path,
+            meta=meta,
+            local=local,
+            persist=persist,
+            transfer=transfer,
+            codec=codec,
+            storage=storage,
+        )
+
+    def _upload(
+        self,
+        key: str,
+        file_path: Path,
+        meta: object,
+        local: bool,
+        persist: bool,
+        transfer: dict,
+        codec: str,
+        storage: str,
+    ):
+        """Uploads a dumped file with its meta, then registers it when `local`."""
+        with self._uploading(
+            key=key,
+            file_path=file_path,
+            meta=meta,
+            local=local,
+            persist=persist,
+            codec=codec,
+            storage=storage,
+        ) as metadata:
+            # upload to cloud
+            with METRICS.timed("upload", key=key):
+                self.service.upload(
+                    key=key, file_path=file_path, transfer=transfer, metadata=metadata
+                )
+
+    @contextmanager
+    def _uploading(
+        self,
+        key: str,
+        file_path: Path,
+        meta: object,
+        local: bool,
+        persist: bool,
+        codec: str,
+        storage: str,
+    ):
+        """Pushes the meta of a dumped file and yields the metadata to upload it with.
+
+        Once uploaded, the file is registered when `local`, deleted otherwise.
+        """
+        try:
+            meta_header = self._push_meta(key=key, meta=meta, local=local)
+            logger.info(f"uploading {key} to cloud service.")
+            yield {"codec": codec, "meta": meta_header, "storage": storage}
+        finally:
+            if not local:
+                self._discard_tmp(file_path)
+
+        if local:
+            # update registery, the meta copy being written by `_push_meta`
+            self._register(
+                key=key, file_path=file_path, persist=persist, keep_meta=True
+            )
+
+    def _push_codec(self, codec: str = None, mmap: bool = False):
+        if mmap:
+            # arrays can only be memory mapped from uncompressed files
+            msg = "memory mapped objects cannot be compressed."
+            assert codec is None or parse_codec(codec)[0] == "none", msg
+            codec = "none"
+        return format_codec(self.codec if codec is None else codec)
+
+    def _push_storage(self, storage: str = None, mmap: bool = False):
+        if storage is None:
+            storage = "file" if mmap else self.storage
+        msg = f"storage '{storage}' not recognized. Allowed storages: {list(STORAGES)}"
+        assert storage in STORAGES, msg
+        msg = f"{storage} objects cannot be memory mapped."
+        assert not (mmap and storage != "file"), msg
+        return storage
+
+    def _push_chunked(
+        self,
+        obj: object,
+        key: str,
+        meta: object,
+        local: bool,
+        persist: bool,
+        transfer: dict,
+        codec: str,
+    ):
+        """Pushes `obj` as content defined chunks, only uploading the chunks the remote lacks.
+
+        The object stored under `key` is a manifest listing the chunks of the
+        serialised file, which is rebuilt on `pull`.
+        """
+        tmp_path = self._dump(obj=obj, meta=meta, key=key, local=False, codec=codec)
+        try:
+            chunks = self._push_chunks(tmp_path)
+            content = dump_manifest(
+                chunks, size=sum(size for _, size in chunks), codec=codec
+            )
+            if local:
+                file_path = self._store_chunks(key, tmp_path, chunks, content)
+        finally:
+            self._discard_tmp(tmp_path)
+        if not local:
+            fd, file_path = tempfile.mkstemp(prefix=".daman-", suffix=".tmp")
+            os.close(fd)
+            file_path = Path(file_path)
+            self._write_atomic(file_path, content)
+
+        try:
+            meta_header = self._push_meta(key=key, meta=meta, local=local)
+            logger.info(f"uploading {key} manifest to cloud service.")
+            self.service.upload(
+                key=key,
+                file_path=file_path,
+                transfer=transfer,
+                metadata={"codec": codec, "meta": meta_header, "storage": "chunked"},
+            )
+        except BaseException:
+            if local:
+                self._release_chunked(key)
+            raise
+        finally:
+            if not local:
+                self._discard_tmp(file_path)
+
+        if local:
+            self._register(
+                key=key,
+                file_path=file_path,
+                persist=persist,
+                keep_meta=True,
+                size=len(content) + self.session.chunk_store.charged(key),
+                codec=codec,
+                storage="chunked",
+            )
+
+    def _store_chunks(self, key: str, file_path: Path, chunks: list, content: bytes):
+        """Stores the `chunks` of `file_path` missing locally and the manifest of `key`, once space is made."""
+        store = self.session.chunk_store
+        # referenced before evicting so that the chunks it shares are kept
+        charged = store.add_refs(key, chunks)
+        manifest_path = self._local_path(key)
+        try:
+            logger.info(f"ensuring disc space available")
+            # only the manifest and the chunks no other local key holds take space
+            self.clear_disc(space=(len(content) + charged) / 2 ** 20, keep=[key])
+            with file_path.open("rb") as fr:
+                for chunk, size in chunks:
+                    chunk_content = fr.read(size)
+                    if not store.has(chunk):
+                        store.write(chunk, chunk_content)
+            self._write_atomic(manifest_path, content)
+        except BaseException:
+            self._release_chunked(key)
+            raise
+        return manifest_path
+
+    def _release_chunked(self, key: str):
+        """Drops the chunks referenced by `key` after a failed pull or push."""
+        # the references of a previous version were replaced as well
+        if key in self.registery:
+            self.delete(key=key, local=True, remote=False)
+        else:
+            self.session.chunk_store.release(key)
+            self._discard_tmp(self._local_path(key))
+
+    def _push_chunks(self, file_path: Path):
+        """Splits `file_path` in chunks and uploads the new ones, returns `[(hash, size)]`."""
+        chunks = []
+        seen = set()
+        uploaded = 0
+        with ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS) as executor:
+            pending = set()
+            with file_path.open("rb") as fr:
+                for content in iter_chunks(fr):
+                    chunk = chunk_hash(content)
+                    chunks.append((chunk, len(content)))
+                    if chunk in seen:
+                        continue
+                    seen.add(chunk)
+                    if not self.service.exists(CHUNK_PREFIX + chunk):
+                        pending.add(executor.submit(self._upload_chunk, chunk, content))
+                        uploaded += 1
+                    # bounds the number of chunks held in memory
+                    while len(pending) >= 2 * DEFAULT_MAX_WORKERS:
+                        done, pending = futures_wait(
+                            pending, return_when=FIRST_COMPLETED
+                        )
+                        for future in done:
+                            future.result()
+            for future in pending:
+                future.result()
+        logger.info(f"{uploaded} of {len(chunks)} chunks uploaded.")
+        return chunks
+
+    def _upload_chunk(self, chunk: str, content: bytes):
+        with BytesIO(content) as buffer:
+            self.service.upload(key=CHUNK_PREFIX + chunk, buffer=buffer)
+
+    def _check_key_available(self, key: str, force: bool, exists: bool = None):
+        if self.service.exists(key) if exists is None else exists:
             if force:
                 logger.warning(f"`{key}` already in use and will be over-written.")
             else:
@@ -116,109 +848,1040 @@ class DataManager:
                 logger.error(err_msg)
                 raise KeyError(err_msg)
 
-        with BytesIO() as file_buffer:
-            joblib.dump(obj, file_buffer)
-            # reset buffer pointer
-            file_buffer.seek(0)
+    def _dump(
+        self,
+        obj: object,
+        meta: object,
+        key: str,
+        local: bool,
+        codec: str,
+        storage: str = DEFAULT_STORAGE,
+    ):
+        """Serialises `obj` to a temporary file (as parquet for `columnar` storage), hashing it while writing.
+
+        When `local` the file is then atomically moved to the data folder, otherwise
+        it is left in the system temporary directory and must be discarded once uploaded.
+        """
+        tmp_path, hashes = self._serialise(
+            obj=obj, meta=meta, key=key, local=local, codec=codec, storage=storage
+        )
+        if local:
+            return self._install(key=key, tmp_path=tmp_path, hashes=hashes)
+        self.session.hash_cache.store(tmp_path, hashes)
+        return tmp_path
+
+    def _serialise(
+        self, obj: object, meta: object, key: str, local: bool, codec: str, storage: str
+    ):
+        """Writes `obj` to a temporary file (in the data folder when `local`), returns it with its hashes."""
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.data_folder if local else None, prefix=".daman-", suffix=".tmp"
+        )
+        tmp_path = Path(tmp_path)
+        try:
+            with METRICS.timed("dump", key=key), os.fdopen(fd, "wb") as fw:
+                writer = HashingWriter(fw)
+                if storage == "columnar":
+                    write_columnar(obj, meta=meta, file=writer, codec=codec)
+                else:
+                    get_joblib().dump(
+                        {"data": obj, "meta": meta},
+                        writer,
+                        compress=joblib_compress(codec),
+                    )
+        except BaseException:
+            self._discard_tmp(tmp_path)
+            raise
+        return tmp_path, writer.hashes
+
+    def _install(self, key: str, tmp_path: Path, hashes: dict, reserve: bool = True):
+        """Moves a dumped file to the data folder, first making space unless `reserve` is false."""
+        try:
+            if reserve:
+                logger.info(f"ensuring disc space available")
+                self.clear_disc(space=getsize(tmp_path) / 2 ** 20)
+
+            logger.info(f"storing `{key}` data locally.")
+            file_path = self._local_path(key)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            self._discard_tmp(tmp_path)
+            raise
+
+        self.session.hash_cache.store(file_path, hashes)
+        return file_path
+
+    def _push_meta(self, key: str, meta: object, local: bool):
+        """Stores `meta` apart from the data, returns the header recorded in the object metadata.
+
+        Small values made of JSON types only (so that `meta` returns them unchanged)
+        are inlined in the object metadata, others are stored in a sidecar object
+        (and locally when `local`). Copies of the previous meta are deleted.
+        """
+        self._discard_local_meta(key)
+        inline = None
+        if _is_plain_json(meta):
+            try:
+                inline = orjson.dumps(meta).decode()
+            except TypeError:  # e.g. integers larger than 64 bits
+                pass
+        if inline is not None and inline.isascii() and len(inline) <= INLINE_META_SIZE:
+            self._delete_remote_meta(key)
+            return f"inline:{inline}"
 
+        with BytesIO() as buffer:
+            get_joblib().dump(meta, buffer)
+            buffer.seek(0)
             if local:
+                meta_path = self._local_meta_path(key)
+                meta_path.parent.mkdir(parents=True, exist_ok=True)
+                meta_path.write_bytes(buffer.getvalue())
+            self.service.upload(key=META_PREFIX + key, buffer=buffer)
+        return "sidecar"
+
+    def _local_path(self, key: str):
+        # keys may contain `/`, stored in sub folders
+        file_path = (self.data_folder / key).resolve()
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        return file_path
+
+    def _local_meta_path(self, key: str):
+        return self.data_folder / LOCAL_META_FOLDER / key
+
+    def _discard_local_meta(self, key: str):
+        meta_path = self._local_meta_path(key)
+        if meta_path.exists():
+            os.remove(meta_path)
+
+    def meta(self, key: str):
+        """Meta information stored with `key`, without downloading its data."""
+        msg = f"key '{key}' not found"
+        assert self.service.exists(key), msg
+
+        entry = self.service.entry(key)
+        meta_header = entry.get("meta")
+        if meta_header is None:
+            logger.warning(
+                f"`{key}` meta is not stored separately, the whole object is pulled."
+            )
+            return self.pull(key, memory_only=key not in self.registery)[1]
+        if meta_header.startswith("inline:"):
+            return orjson.loads(meta_header[len("inline:") :])
+
+        # the local copy is only valid while the local file is the remote version
+        item = self.registery[key] if key in self.registery else None
+        current = item is not None and item["etag"] == entry["etag"]
+        meta_path = self._local_meta_path(key)
+        if current and meta_path.exists():
+            return get_joblib().load(meta_path)
+        with BytesIO() as buffer:
+            self.service.download(key=META_PREFIX + key, buffer=buffer)
+            buffer.seek(0)
+            if current:
+                meta_path.parent.mkdir(parents=True, exist_ok=True)
+                meta_path.write_bytes(buffer.getvalue())
+            return get_joblib().load(buffer)
+
+    def meta_many(
+        self,
+        keys: Iterable[str],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        as_completed: bool = False,
+    ):
+        """Meta information of several keys, results are returned as in `pull_many`."""
+        results = self._run_batch(
+            self.meta,
+            list(dict.fromkeys(keys)),
+            max_workers=max_workers,
+            as_completed=as_completed,
+        )
+        return results if as_completed else list(results)
+
+    def _discard_tmp(self, file_path: Path):
+        if file_path.exists():
+            os.remove(file_path)
+        self.session.hash_cache.discard(file_path)
+
+    def pull_many(
+        self,
+        keys: Iterable[str],
+        force: bool = False,
+        persist: bool = None,
+        memory_only: bool = False,
+        validation: str = None,
+        transfer: dict = None,
+        mmap_mode: str = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        as_completed: bool = False,
+    ):
+        """Pulls several keys concurrently.
+
+        Returns a list of `BatchResult(key, value, error)` in the order of `keys`, or an
+        iterator of results as they complete when `as_completed` is set. `value` is
+        the `(data, meta)` tuple returned by `pull`, `error` the exception raised for
+        that key. Space is reserved once for the batch as in `prefetch`, the keys that
+        cannot fit failing with an `IOError`.
+        """
+        keys = list(dict.fromkeys(keys))
+        to_fetch = {key for key in keys if force or key not in self.registery}
+
+        too_large = set()
+        if to_fetch and not memory_only:
+            # a single disc space reservation for the whole batch
+            too_large = self._reserve_batch(
+                [key for key in keys if key in to_fetch], keep=keys
+            )
+
+        def pull_key(key):
+            value = self._cached(
+                key, force=force, persist=persist, mmap_mode=mmap_mode
+            )
+            if value is not None:
+                return value
+            if key not in to_fetch:
+                value = self._load_local(
+                    key=key,
+                    persist=persist,
+                    validation=validation,
+                    mmap_mode=mmap_mode,
+                )
+            else:
+                msg = f"key '{key}' not found"
+                assert self.service.exists(key), msg
+                if key in too_large:
+                    raise IOError(f"not enough space available to pull `{key}`.")
+                value = self._fetch(
+                    key=key,
+                    persist=persist,
+                    memory_only=memory_only,
+                    transfer=transfer,
+                    reserve=False,
+                    mmap_mode=mmap_mode,
+                )
+            return self._cache(key, value, mmap_mode=mmap_mode)
+
+        results = self._run_batch(
+            pull_key, keys, max_workers=max_workers, as_completed=as_completed
+        )
+        return results if as_completed else list(results)
+
+    def push_many(
+        self,
+        items: Union[dict, Iterable[tuple]],
+        local: bool = True,
+        force: bool = False,
+        persist: bool = False,
+        transfer: dict = None,
+        codec: str = None,
+        mmap: bool = False,
+        storage: str = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        as_completed: bool = False,
+    ):
+        """Pushes several objects concurrently.
+
+        `items` is either a `{key: obj}` dictionary or an iterable of `(key, obj)` or
+        `(key, obj, meta)` tuples. Existing keys are checked once against the remote
+        index, then objects are dumped concurrently and space is reserved once for
+        all the local files (their size is only known once dumped) before they are
+        uploaded. Chunked objects reserve space one by one, as it depends on the
+        chunks already stored. Results are returned as in `pull_many`.
+        """
+        if isinstance(items, dict):
+            items = items.items()
+        items = {item[0]: tuple(item[1:]) + (None,) for item in items}
+        codec = self._push_codec(codec=codec, mmap=mmap)
+        storage = self._push_storage(storage=storage, mmap=mmap)
+        # a single listing instead of a request per key
+        existing = set(self.service.keys) & set(items)
+
+        def dump_key(key):
+            self._check_key_available(key=key, force=force, exists=key in existing)
+            self.object_cache.invalidate(key)
+            obj, meta = items[key][:2]
+            if storage == "chunked":
+                return self._push_chunked(
+                    obj,
+                    key=key,
+                    meta=meta,
+                    local=local,
+                    persist=persist,
+                    transfer=transfer,
+                    codec=codec,
+                )
+            return self._serialise(
+                obj=obj, meta=meta, key=key, local=local, codec=codec, storage=storage
+            )
+
+        results = {
+            result.key: result
+            for result in self._run_batch(
+                dump_key, list(items), max_workers=max_workers, as_completed=True
+            )
+        }
+        dumped = {
+            key: result.value
+            for key, result in results.items()
+            if result.error is None and storage != "chunked"
+        }
+        if local and dumped:
+            try:
                 logger.info(f"ensuring disc space available")
-                self.clear_disc(space=file_buffer.getbuffer().nbytes / 2 ** 20)
-
-                logger.info(f"storing `{key}` data locally.")
-                # store locally
-                file_path = (self.data_folder / key).resolve()
-                with file_path.open("wb") as fw:
-                    fw.write(file_buffer.read())
-
-                logger.info(f"uploading {key} to cloud service.")
-                # upload to cloud
-                self.service.upload(key=key, file_path=file_path)
-
-                # update registery
-                self.registery[key] = {
-                    "path": str(file_path),
-                    "used": 1,
-                    "created_at": datetime.now(),
-                    "last_used": datetime.now(),
-                    "size": getsize(str(file_path)),
-                    "persist": persist,
-                }
+                self.clear_disc(
+                    space=sum(getsize(tmp_path) for tmp_path, _ in dumped.values())
+                    / 2 ** 20,
+                    keep=list(items),
+                )
+            except IOError as error:
+                for key, (tmp_path, _) in dumped.items():
+                    self._discard_tmp(tmp_path)
+                    results[key] = BatchResult(key=key, value=None, error=error)
+                dumped = {}
+
+        def upload_key(key):
+            tmp_path, hashes = dumped[key]
+            if local:
+                file_path = self._install(
+                    key=key, tmp_path=tmp_path, hashes=hashes, reserve=False
+                )
             else:
-                logger.info(f"uploading {key} to cloud service.")
-                # upload to cloud
-                self.service.upload(key=key, buffer=file_buffer)
+                self.session.hash_cache.store(tmp_path, hashes)
+                file_path = tmp_path
+            self._upload(
+                key=key,
+                file_path=file_path,
+                meta=items[key][1],
+                local=local,
+                persist=persist,
+                transfer=transfer,
+                codec=codec,
+                storage=storage,
+            )
+
+        uploads = self._run_batch(
+            upload_key, list(dumped), max_workers=max_workers, as_completed=as_completed
+        )
+        # keys that failed or were fully pushed (chunked) before the uploads
+        done = [result for key, result in results.items() if key not in dumped]
+        if as_completed:
+            return chain(done, uploads)
+        results.update((result.key, result) for result in uploads)
+        return [results[key] for key in items]
+
+    def prefetch(
+        self,
+        keys: Iterable[str] = None,
+        prefix: str = None,
+        manifest: Union[str, Path] = None,
+        persist: bool = False,
+        validation: str = None,
+        transfer: dict = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        background: bool = False,
+    ):
+        """Downloads concurrently the keys missing or outdated locally, without loading them.
+
+        Keys are given as a list, a remote `prefix` and/or a `manifest` file listing a
+        key per line (blank lines and `#` comments are ignored). Space is reserved
+        once for the whole batch within the allocated space, evicting files according
+        to the eviction policy, and the keys that cannot fit are not downloaded.
+
+        Returns a list of `BatchResult(key, value, error)`, `value` being whether
+        the key was downloaded (`False` when the local file was already valid). When
+        `background`, returns right away a `Future` of that list.
+        """
+        if background:
+            executor = ThreadPoolExecutor(max_workers=1)
+            future = executor.submit(
+                self.prefetch,
+                keys=keys,
+                prefix=prefix,
+                manifest=manifest,
+                persist=persist,
+                validation=validation,
+                transfer=transfer,
+                max_workers=max_workers,
+            )
+            executor.shutdown(wait=False)
+            return future
+
+        keys = self._prefetch_keys(keys=keys, prefix=prefix, manifest=manifest)
+        to_fetch = [key for key in keys if not self._prefetch_valid(key, validation)]
+        too_large = self._reserve_batch(to_fetch, keep=keys)
+        valid = set(keys) - set(to_fetch)
+        logger.info(
+            f"prefetching {len(to_fetch) - len(too_large)} of {len(keys)} keys, {len(valid)} already available."
+        )
+
+        def prefetch_key(key):
+            if key in valid:
+                if persist:
+                    self.registery.update(key, persist=True)
+                return False
+            if key in too_large:
+                raise IOError(f"not enough space available to prefetch `{key}`.")
+            msg = f"key '{key}' not found"
+            assert self.service.exists(key), msg
+            METRICS.increment("prefetched", key=key)
+            if self.service.entry(key).get("storage") == "chunked":
+                self._fetch_chunked(
+                    key=key,
+                    persist=persist,
+                    transfer=transfer,
+                    reserve=False,
+                    load=False,
+                )
+            else:
+                self._download_file(
+                    key=key, persist=persist, transfer=transfer, reserve=False
+                )
+            self.object_cache.invalidate(key)
+            return True
+
+        return list(
+            self._run_batch(
+                prefetch_key, keys, max_workers=max_workers, as_completed=False
+            )
+        )
+
+    def _prefetch_keys(
+        self,
+        keys: Iterable[str] = None,
+        prefix: str = None,
+        manifest: Union[str, Path] = None,
+    ):
+        msg = "`keys`, `prefix` or `manifest` must be provided."
+        assert keys is not None or prefix is not None or manifest is not None, msg
+
+        keys = list(keys or [])
+        if prefix is not None:
+            keys += [key for key, _ in self.service.entries(prefix)]
+        if manifest is not None:
+            with open(manifest, "r") as fr:
+                for line in fr:
+                    line = line.split("#", 1)[0].strip()
+                    if line:
+                        keys.append(line)
+        return list(dict.fromkeys(keys))
+
+    def _prefetch_valid(self, key: str, validation: str = None):
+        """Whether `key` is available locally and matches its remote version."""
+        item = self.registery[key] if key in self.registery else None
+        if item is None or not Path(item["path"]).exists():
+            return False
+        with METRICS.timed("validate", key=key):
+            return self.check_valid(key=key, item=item, validation=validation)
+
+    def _reserve_batch(self, keys: Iterable[str], keep: Iterable[str]):
+        """Frees disc space for as many of `keys` as possible, in order.
+
+        Only the files that are neither persisted nor in `keep` can be evicted.
+        Returns the keys that could not fit.
+        """
+        keep = set(keep)
+        with self._disc_lock:
+            budget = self.available_disc() * 2 ** 20 + sum(
+                item["size"]
+                for key, item in self.registery.items
+                if key not in keep and not item["persist"]
+            )
+            required = 0
+            too_large = set()
+            chunks = set()
+            for key in keys:
+                if not self.service.exists(key):
+                    # reported as missing when prefetched
+                    continue
+                if self.service.entry(key).get("storage") == "chunked":
+                    size = self._chunked_size(key, seen=chunks)
+                else:
+                    size = self.service.file_size(key)
+                if key in self.registery:
+                    # replaced by its remote version
+                    size -= self.registery[key]["size"]
+                if required + size > budget:
+                    too_large.add(key)
+                else:
+                    required += size
+            if required > 0:
+                self.clear_disc(space=required / 2 ** 20, keep=keep)
+        return too_large
+
+    def _chunked_size(self, key: str, seen: set):
+        """Bytes pulling chunked `key` adds: its manifest and the chunks neither local nor `seen`."""
+        with BytesIO() as buffer:
+            self.service.download(key=key, buffer=buffer)
+            content = buffer.getvalue()
+        store = self.session.chunk_store
+        size = len(content)
+        for chunk, chunk_size in load_manifest(content)["chunks"]:
+            if chunk not in seen and not store.has(chunk):
+                size += chunk_size
+            seen.add(chunk)
+        return size
+
+    @staticmethod
+    def _run_batch(func, keys, max_workers: int, as_completed: bool):
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(func, key): key for key in keys}
+            for future in futures_completed(futures) if as_completed else futures:
+                key = futures[future]
+                try:
+                    yield BatchResult(key=key, value=future.result(), error=None)
+                except Exception as error:
+                    logger.error(f"`{key}` failed: {error!r}")
+                    yield BatchResult(key=key, value=None, error=error)
+
+    @property
+    def codec(self):
+        return self.config.get("data", "codec", fallback=DEFAULT_CODEC)
+
+    @property
+    def storage(self):
+        return self.config.get("data", "storage", fallback=DEFAULT_STORAGE)
+
+    @property
+    def mmap_mode(self):
+        mmap_mode = self.config.get("data", "mmap_mode", fallback=None)
+        return None if mmap_mode in (None, "", "none") else mmap_mode
+
+    @property
+    def eviction(self):
+        return self.config["local"].get("eviction", DEFAULT_EVICTION)
+
+    def eviction_policy(self, eviction: str = None):
+        """Policy instance of `eviction`, kept alive as some policies are stateful."""
+        if eviction is None:
+            eviction = self.eviction
+        policy = self._eviction_policies.get(eviction)
+        if policy is None:
+            policy = get_policy(eviction)
+            self._eviction_policies[eviction] = policy
+        return policy
+
+    @property
+    def validation(self):
+        return self.config["local"].get("validation", "always")
+
+    @property
+    def validation_ttl(self):
+        return self.config["local"].getfloat(
+            "validation_ttl", fallback=DEFAULT_VALIDATION_TTL
+        )
+
+    def check_valid(self, key: str, item: dict, validation: str = None):
+        if validation is None:
+            validation = self.validation
+        msg = f"validation '{validation}' not recognized. Allowed policies: {list(VALIDATION_POLICIES)}"
+        assert validation in VALIDATION_POLICIES, msg
+
+        if validation == "never":
+            return True
+        if validation == "ttl" and item["validated_at"] is not None:
+            age = datetime.now() - datetime.fromisoformat(item["validated_at"])
+            if age < timedelta(minutes=self.validation_ttl):
+                return True
+
+        file_path = Path(item["path"])
+        fields = {"validated_at": datetime.now()}
+        if validation == "etag":
+            # single HEAD request, no local hashing
+            remote = self.service.head(key)
+            if remote is None:
+                logger.warning(f"{key} is not available on the cloud service.")
+                return True
+            if item["etag"] is not None:
+                is_valid = (
+                    remote["etag"] == item["etag"]
+                    and remote["size"] == getsize(file_path)
+                )
+            else:
+                is_valid = self.service.local_matches(
+                    file_path, md5=remote["md5"], fasthash=remote.get("fasthash")
+                )
+                fields["etag"] = remote["etag"]
+        else:
+            is_valid = self.service.check_valid(key=key, file_path=file_path)
+
+        if is_valid:
+            self.registery.update(key, **fields)
+        return is_valid
+
+    def refresh(self):
+        self.service.refresh()
 
     def delete(self, key: str, local: bool = True, remote: bool = False):
+        self.object_cache.invalidate(key)
         if local:
             logger.info(f"deleting `{key}` data locally.")
-            item = self.registery[key]
-            # delete file
-            del self.registery[key]
+            item = self._unregister(key)
             # delete local file
             os.remove(item["path"])
         if remote:
             logger.info(f"deleting `{key}` data on cloud service.")
+            self._delete_remote_meta(key)
             # delete remote file
             self.service.delete(key=key)
 
+    def _unregister(self, key: str):
+        item = self.registery[key]
+        del self.registery[key]
+        self.session.hash_cache.discard(item["path"])
+        if item["storage"] == "chunked":
+            self.session.chunk_store.release(key)
+        self._discard_local_meta(key)
+        return item
+
+    def _delete_remote_meta(self, key: str):
+        entry = self.service.entry(key) if self.service.exists(key) else None
+        if entry is not None and entry.get("meta") == "sidecar":
+            self.service.delete(key=META_PREFIX + key)
+
     @property
     def summary(self):
-        service_keys = list(self.service.keys)
-        return pd.DataFrame(
-            [
-                {
-                    "key": key,
-                    "local": key in self.registery,
-                    "remote": key in service_keys,
-                    "size (MB)": round(
-                        (
-                            self.registery[key]["size"]
-                            if key in self.registery.keys
-                            else self.service.file_size(key)
-                        )
-                        / 2 ** 20,
-                        2,
-                    ),
-                }
-                for key in (set(self.service.keys) | set(self.registery.keys))
-            ]
+        return self.get_summary()
+
+    def iter_summary(
+        self,
+        prefix: str = None,
+        pattern: str = None,
+        sort: str = None,
+        descending: bool = False,
+        limit: int = None,
+        meta: bool = False,
+    ):
+        """Yields a row per local or remote key matching `prefix` and the glob `pattern`.
+
+        Rows are built from the remote listing and the registery, without any
+        request per key, and streamed unless sorted by one of `SUMMARY_SORTS`.
+        `meta` adds the meta information of the remote keys.
+        """
+        if sort is not None:
+            msg = f"sort '{sort}' not recognized. Allowed sorts: {list(SUMMARY_SORTS)}"
+            assert sort in SUMMARY_SORTS, msg
+
+        def matches(key):
+            return (prefix is None or key.startswith(prefix)) and (
+                pattern is None or fnmatchcase(key, pattern)
+            )
+
+        local = {key: item for key, item in self.registery.items if matches(key)}
+
+        def rows():
+            for key, entry in self.service.entries(prefix=prefix):
+                if matches(key):
+                    yield self._summary_row(key, local.pop(key, None), entry)
+            for key, item in local.items():
+                yield self._summary_row(key, item, None)
+
+        summary = rows()
+        if sort is not None:
+            column = SUMMARY_SORTS[sort]
+            summary = sorted(summary, key=lambda row: row[column], reverse=descending)
+        summary = islice(summary, limit)
+
+        if not meta:
+            yield from summary
+            return
+        summary = list(summary)
+        metas = {
+            result.key: result.value
+            for result in self.meta_many(row["key"] for row in summary if row["remote"])
+        }
+        for row in summary:
+            yield {**row, "meta": metas.get(row["key"])}
+
+    @staticmethod
+    def _summary_row(key: str, item: dict, entry: dict):
+        size = item["size"] if item is not None else entry["size"]
+        return {
+            "key": key,
+            "local": item is not None,
+            "remote": entry is not None,
+            "size (MB)": round(size / 2 ** 20, 2),
+        }
+
+    def get_summary(
+        self,
+        meta: bool = False,
+        prefix: str = None,
+        pattern: str = None,
+        sort: str = None,
+        descending: bool = False,
+        limit: int = None,
+    ):
+        """Summary of the local and remote keys as a pandas `DataFrame`, see `iter_summary`."""
+        import pandas as pd
+
+        rows = self.iter_summary(
+            prefix=prefix,
+            pattern=pattern,
+            sort=sort,
+            descending=descending,
+            limit=limit,
+            meta=meta,
         )
+        columns = list(SUMMARY_COLUMNS) + (["meta"] if meta else [])
+        return pd.DataFrame(list(rows), columns=columns)
+
+    def _async_limit(self):
+        # imported by the running event loop already, asyncio primitives are bound to it
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.async_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    @staticmethod
+    async def _in_executor(func, *args, **kwargs):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(func, *args, **kwargs))
+
+    async def apull(
+        self,
+        key: str,
+        force: bool = False,
+        persist: bool = None,
+        memory_only: bool = False,
+        validation: str = None,
+        transfer: dict = None,
+        mmap_mode: str = None,
+        columns: list = None,
+        filters: object = None,
+    ):
+        if columns is not None or filters is not None:
+            async with self._async_limit():
+                return await self._in_executor(
+                    self._pull_columnar,
+                    key,
+                    columns=columns,
+                    filters=filters,
+                    force=force,
+                    persist=persist,
+                    validation=validation,
+                )
+
+        value = self._cached(key, force=force, persist=persist, mmap_mode=mmap_mode)
+        if value is not None:
+            return value
+        async with self._async_limit():
+            value = await self._apull(
+                key=key,
+                force=force,
+                persist=persist,
+                memory_only=memory_only,
+                validation=validation,
+                transfer=transfer,
+                mmap_mode=mmap_mode,
+            )
+        return await self._in_executor(self._cache, key, value, mmap_mode=mmap_mode)
+
+    async def _apull(
+        self,
+        key: str,
+        force: bool,
+        persist: bool,
+        memory_only: bool,
+        validation: str,
+        transfer: dict,
+        mmap_mode: str,
+    ):
+        if key in self.registery and not force:
+            return await self._in_executor(
+                self._load_local,
+                key=key,
+                persist=persist,
+                validation=validation,
+                mmap_mode=mmap_mode,
+            )
+
+        msg = f"key '{key}' not found"
+        with METRICS.timed("exists", key=key):
+            assert await self.service.aexists(key), msg
+
+        METRICS.increment("local_misses", key=key)
+        if persist is None:
+            persist = False
+
+        entry = await self._in_executor(self.service.entry, key)
+        if entry.get("storage") == "chunked":
+            return await self._in_executor(
+                self._fetch_chunked,
+                key=key,
+                persist=persist,
+                memory_only=memory_only,
+                transfer=transfer,
+                mmap_mode=mmap_mode,
+            )
+
+        if memory_only:
+            with BytesIO() as buffer:
+                with METRICS.timed("download", key=key):
+                    await self.service.adownload(
+                        key=key, buffer=buffer, transfer=transfer
+                    )
+                buffer.seek(0)
+                return await self._in_executor(self._load_buffer, buffer)
+
+        import asyncio
+
+        cancel = Event()
+        try:
+            file_path = await self._in_executor(
+                self._download_file,
+                key=key,
+                persist=persist,
+                transfer=transfer,
+                cancel=cancel,
+            )
+        except asyncio.CancelledError:
+            # stops the transfer running in the executor
+            cancel.set()
+            raise
+        return await self._in_executor(self._load, file_path, mmap_mode=mmap_mode)
+
+    async def apush(
+        self,
+        obj: object,
+        key: str,
+        meta: object = None,
+        local: bool = True,
+        force: bool = False,
+        persist: bool = False,
+        transfer: dict = None,
+        codec: str = None,
+        mmap: bool = False,
+        storage: str = None,
+    ):
+        async with self._async_limit():
+            await self._in_executor(self._check_key_available, key=key, force=force)
+            self.object_cache.invalidate(key)
+            codec = self._push_codec(codec=codec, mmap=mmap)
+            storage = self._push_storage(storage=storage, mmap=mmap)
+            if storage == "chunked":
+                return await self._in_executor(
+                    self._push_chunked,
+                    obj,
+                    key=key,
+                    meta=meta,
+                    local=local,
+                    persist=persist,
+                    transfer=transfer,
+                    codec=codec,
+                )
+
+            file_path = await self._in_executor(
+                self._dump,
+                obj=obj,
+                meta=meta,
+                key=key,
+                local=local,
+                codec=codec,
+                storage=storage,
+            )
+            # the steps around the upload are blocking, they run in the executor
+            uploading = self._uploading(
+                key=key,
+                file_path=file_path,
+                meta=meta,
+                local=local,
+                persist=persist,
+                codec=codec,
+                storage=storage,
+            )
+            metadata = await self._in_executor(uploading.__enter__)
+            try:
+                with METRICS.timed("upload", key=key):
+                    await self.service.aupload(
+                        key=key,
+                        file_path=file_path,
+                        transfer=transfer,
+                        metadata=metadata,
+                    )
+            except BaseException as error:
+                await self._in_executor(
+                    uploading.__exit__, type(error), error, error.__traceback__
+                )
+                raise
+            await self._in_executor(uploading.__exit__, None, None, None)
+
+    async def adelete(self, key: str, local: bool = True, remote: bool = False):
+        self.object_cache.invalidate(key)
+        async with self._async_limit():
+            if local:
+                await self._in_executor(self.delete, key=key, local=True, remote=False)
+            if remote:
+                logger.info(f"deleting `{key}` data on cloud service.")
+                await self._in_executor(self._delete_remote_meta, key)
+                await self.service.adelete(key=key)
+
+    async def asummary(self, meta: bool = False, **kwargs):
+        async with self._async_limit():
+            return await self._in_executor(self.get_summary, meta=meta, **kwargs)
 
     def available_disc(self):
-        if self.config["local"]["allocated_space"] is None:
+        allocated_space = self.config["local"].get("allocated_space")
+        if allocated_space is None:
+            import psutil
+
             free_space = (
-                psutil.disk_usage(self.data_folder).free() / 2 ** 20
+                psutil.disk_usage(str(self.data_folder)).free / 2 ** 20
             )  # disc space in megabytes
         else:
-            free_space = int(self.config["local"]["allocated_space"]) - dir_size(
-                self.data_folder
-            )
+            free_space = int(allocated_space) - self.registery.usage / 2 ** 20
         return free_space
 
+    def reconcile(self, fix: bool = True):
+        """Compares the registery with the content of the data folder.
+
+        Returns the registered keys whose file is `missing`, the `orphans` files not
+        registered and the keys whose registered size was wrong (`resized`). When
+        `fix`, missing keys are unregistered, orphans deleted, sizes corrected and
+        the usage recomputed. Stale `temporary` files left by killed processes are
+        listed as well, and deleted when `fix`.
+        """
+        report = {"missing": [], "orphans": [], "resized": [], "temporary": []}
+        with self._disc_lock:
+            items = self.registery.items
+            paths = {Path(item["path"]) for _, item in items}
+            for key, item in items:
+                file_path = Path(item["path"])
+                if not file_path.exists():
+                    report["missing"].append(key)
+                elif (
+                    item["storage"] != "chunked"
+                    and getsize(file_path) != item["size"]
+                ):
+                    report["resized"].append(key)
+            for root, dirs, files in os.walk(self.data_folder):
+                # hidden folders and files hold meta, chunks and temporary files
+                dirs[:] = [name for name in dirs if not name.startswith(".")]
+                for name in files:
+                    file_path = (Path(root) / name).resolve()
+                    if not name.startswith(".") and file_path not in paths:
+                        report["orphans"].append(str(file_path))
+            report["temporary"] = clear_stale_tmp_files(
+                self.data_folder, dry_run=not fix
+            )
+
+            if fix:
+                for key in report["missing"]:
+                    logger.warning(f"local `{key}` file is missing, unregistering it.")
+                    self._unregister(key)
+                for file_path in report["orphans"]:
+                    logger.warning(f"`{file_path}` is not registered, deleting it.")
+                    os.remove(file_path)
+                    self.session.hash_cache.discard(file_path)
+                for key in report["resized"]:
+                    self.registery.update(
+                        key, size=getsize(self.registery[key]["path"])
+                    )
+                self.registery.recompute_usage()
+        return report
+
+    def _clear_stale_tmp_files(self):
+        # walking the data folder is not cheap, it is done at most once per interval
+        now = datetime.now()
+        if (
+            self._tmp_scanned_at is not None
+            and (now - self._tmp_scanned_at).total_seconds() < TMP_SCAN_INTERVAL
+        ):
+            return
+        self._tmp_scanned_at = now
+        for tmp_path in clear_stale_tmp_files(self.data_folder):
+            logger.info(f"deleted stale temporary file `{tmp_path}`.")
+
+    def _evictable(self, key: str, item: dict):
+        if item["storage"] != "chunked":
+            return item
+        # the chunks other keys reference are kept when evicting a chunked key
+        return {**item, "size": item["size"] - self.session.chunk_store.shared(key)}
+
     def clear_disc(
-        self, key: str = None, space: int = None, ignore_persist: bool = False
+        self,
+        key: str = None,
+        space: int = None,
+        ignore_persist: bool = False,
+        keep: Iterable[str] = None,
+        eviction: str = None,
+        dry_run: bool = False,
     ):
+        """Evicts local files until `space` MB (or the size of `key`) are available.
+
+        Victims are chosen at once by the `eviction` policy (defaults to the configured
+        one) among the files that are neither persisted (unless `ignore_persist`)
+        nor in `keep`, reading the registery in the order of the policy only until
+        enough space is freed. Returns the evicted keys, which are only listed when
+        `dry_run`.
+        Partial downloads and temporary files left unfinished for a day are deleted
+        as well.
+        """
         if key is not None:
             file_size = self.service.file_size(key=key) / 2 ** 20
         else:
             file_size = space
+        keep = set(keep or [])
+        policy = self.eviction_policy(eviction)
 
-        while self.available_disc() < file_size:
-            logger.info(
-                f"deleting `{file_size - self.available_disc()}` data on cloud service."
-            )
-            items = sorted(
-                self.registery.items,
-                key=lambda x: (x[1]["persist"], x[1]["last_used"], x[1]["used"]),
-            )
+        with self._disc_lock, METRICS.timed("evict"):
+            if not dry_run:
+                # downloads interrupted long ago and never resumed
+                for partial in clear_stale_partials(
+                    self.session.partial_folder, locks=self.session.locks
+                ):
+                    logger.info(f"deleted stale partial download of `{partial}`.")
+                self._clear_stale_tmp_files()
+            required = (file_size - self.available_disc()) * 2 ** 20
+            now = datetime.now()
+            expiry = policy.expiry(now)
+            if required <= 0 and expiry is None:
+                return []
 
-            if len(items) > 0:
-                del_key, del_item = items[0]
-                if not del_item["persist"] or ignore_persist:
-                    self.delete(key=del_key, local=True, remote=False)
-                    continue
+            where = "1" if ignore_persist else "persist = 0"
+            expired = []
+            if expiry is not None:
+                rows = self.registery.ordered(
+                    policy.order,
+                    where=f"{where} AND last_used < ?",
+                    params=(expiry.isoformat(),),
+                )
+                expired = [
+                    (item_key, self._evictable(item_key, item))
+                    for item_key, item in rows
+                    if item_key not in keep
+                ]
+            rows = self.registery.ordered(policy.order, where=where)
+            try:
+                victims = policy.victims(
+                    (
+                        (item_key, self._evictable(item_key, item))
+                        for item_key, item in rows
+                        if item_key not in keep
+                    ),
+                    space=required,
+                    expired=expired,
+                    now=now,
+                )
+            finally:
+                rows.close()
+            freed = sum(size for _, size, _ in victims)
+            if freed < required:
+                raise IOError(
+                    f"Not enough space available. Only {self.available_disc()} MB available but {file_size} MB required. No additional file can be deleted."
+                )
 
-            raise IOError(
-                f"Not enough space available. Only {self.available_disc()} MB available but {file_size} MB required. No additional file can be deleted."
-            )
+            if victims and not dry_run:
+                logger.info(
+                    f"evicting {len(victims)} local files ({freed / 2 ** 20:.2f} MB)."
+                )
+                for victim, _, priority in victims:
+                    self.delete(key=victim, local=True, remote=False)
+                    policy.evicted(priority, self.registery)
+                METRICS.increment("evictions", len(victims))
+                METRICS.increment("evicted_bytes", freed)
+            return [victim for victim, _, _ in victims]
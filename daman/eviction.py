@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+from typing import Iterable, Tuple
+
+
+DEFAULT_EVICTION = "lru"
+DEFAULT_EVICTION_TTL = 24 * 60  # minutes
+
+
+def _timestamp(value):
+    return datetime.fromisoformat(value).timestamp() if value else 0.0
+
+
+class EvictionPolicy:
+    """Orders local files by eviction priority, the lowest priority being evicted first."""
+
+    name = None
+    # SQL ordering of the registery rows by increasing priority, served by an index
+    order = None
+
+    def priority(self, item: dict, now: datetime):
+        raise NotImplementedError
+
+    def expiry(self, now: datetime):
+        """Last use date before which files are always evicted, `None` if they never expire."""
+        return None
+
+    def evicted(self, priority: float, registery):
+        """Called for each file actually evicted from `registery`."""
+
+    def victims(
+        self,
+        items: Iterable[Tuple[str, dict]],
+        space: float,
+        expired: Iterable[Tuple[str, dict]] = (),
+        now=None,
+    ):
+        """Files to evict in order to free `space` bytes.
+
+        `items` are sorted by `order` and only read until `space` is freed, the
+        `expired` files being evicted regardless. Returns `(key, size, priority)`
+        tuples in eviction order.
+        """
+        if now is None:
+            now = datetime.now()
+        victims = [(key, item["size"], None) for key, item in expired]
+        freed = sum(size for _, size, _ in victims)
+        evicted = {key for key, _, _ in victims}
+        for key, item in items:
+            if freed >= space:
+                break
+            if key in evicted:
+                continue
+            victims.append((key, item["size"], self.priority(item, now)))
+            freed += item["size"]
+        return victims
+
+
+class LRUPolicy(EvictionPolicy):
+    """Least recently used files first."""
+
+    name = "lru"
+    order = "last_used"
+
+    def priority(self, item, now):
+        return _timestamp(item["last_used"])
+
+
+class LFUPolicy(EvictionPolicy):
+    """Least frequently used files first, the least recently used among equals."""
+
+    name = "lfu"
+    order = "used, last_used"
+
+    def priority(self, item, now):
+        return (item["used"], _timestamp(item["last_used"]))
+
+
+class GDSFPolicy(EvictionPolicy):
+    """Greedy-Dual-Size-Frequency: large and rarely used files first.
+
+    The priority of a file is `inflation + used / size`, `inflation` being the
+    value of the registery clock when the file was last used. The clock is raised
+    to the priority of each evicted file, so that files unused since long age out
+    while recently used ones start from a higher priority.
+    """
+
+    name = "gdsf"
+    order = "inflation + CAST(used AS REAL) / MAX(size, 1)"
+
+    def priority(self, item, now):
+        return item["inflation"] + item["used"] / max(item["size"], 1)
+
+    def evicted(self, priority, registery):
+        if priority is not None:
+            registery.raise_clock(priority)
+
+
+class TTLPolicy(LRUPolicy):
+    """Files unused for more than `ttl` minutes are evicted, then least recently used ones."""
+
+    name = "ttl"
+
+    def __init__(self, ttl: float = DEFAULT_EVICTION_TTL):
+        self.ttl = timedelta(minutes=ttl)
+
+    def expiry(self, now):
+        return now - self.ttl
+
+
+EVICTION_POLICIES = {
+    policy.name: policy for policy in (LRUPolicy, LFUPolicy, GDSFPolicy, TTLPolicy)
+}
+
+
+def get_policy(eviction: str = None):
+    """Builds the policy of a `<name>[:<parameter>]` specification (e.g. `ttl:60`)."""
+    if eviction is None:
+        eviction = DEFAULT_EVICTION
+    name, _, parameter = str(eviction).lower().partition(":")
+
+    msg = f"eviction policy '{name}' not recognized. Allowed policies: {list(EVICTION_POLICIES.keys())}"
+    assert name in EVICTION_POLICIES, msg
+    if parameter:
+        msg = f"only the `ttl` eviction policy accepts a parameter, got '{eviction}'."
+        assert name == "ttl", msg
+        return TTLPolicy(ttl=float(parameter))
+    return EVICTION_POLICIES[name]()
@@ -0,0 +1,147 @@
+import io
+import re
+import time
+import orjson
+from pathlib import Path
+from threading import Lock
+from logging import getLogger
+from contextlib import contextmanager
+from collections import defaultdict
+from typing import Callable, IO, Union
+
+
+logger = getLogger(__name__)
+
+
+class Metrics:
+    """Process wide counters and per-phase timings of daman operations.
+
+    Every measure is also sent as an event (a dictionary) to the registered
+    hooks, e.g. a `JSONLinesExporter`.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.hooks = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = defaultdict(int)  # integer counts stay exact
+            self.timings = {}
+
+    def add_hook(self, hook: Callable[[dict], None]):
+        self.hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook: Callable[[dict], None]):
+        self.hooks.remove(hook)
+
+    def _emit(self, event: dict):
+        if not self.hooks:
+            return
+        event = {"time": time.time(), **event}
+        for hook in list(self.hooks):
+            try:
+                hook(event)
+            except Exception as error:
+                logger.warning(f"metrics hook {hook!r} failed: {error!r}")
+
+    def increment(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            self.counters[name] += value
+        self._emit({"type": "counter", "name": name, "value": value, **labels})
+
+    def observe(self, phase: str, duration: float, **labels):
+        with self._lock:
+            timing = self.timings.setdefault(
+                phase, {"count": 0, "total": 0.0, "max": 0.0}
+            )
+            timing["count"] += 1
+            timing["total"] += duration
+            timing["max"] = max(timing["max"], duration)
+        self._emit({"type": "timing", "phase": phase, "duration": duration, **labels})
+
+    @contextmanager
+    def timed(self, phase: str, **labels):
+        """Records the duration of the wrapped block as `phase`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start, **labels)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "timings": {
+                    phase: {**timing, "mean": timing["total"] / timing["count"]}
+                    for phase, timing in self.timings.items()
+                },
+            }
+
+    def prometheus(self, prefix: str = "daman"):
+        """Measures in the Prometheus text exposition format."""
+        stats = self.stats()
+        lines = []
+        for name, value in sorted(stats["counters"].items()):
+            metric = f"{prefix}_{_metric_name(name)}_total"
+            lines += [
+                f"# TYPE {metric} counter",
+                f"{metric} {_format_value(value)}",
+            ]
+        if stats["timings"]:
+            metric = f"{prefix}_phase_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for phase, timing in sorted(stats["timings"].items()):
+                lines += [
+                    f'{metric}_sum{{phase="{phase}"}} '
+                    f'{_format_value(timing["total"])}',
+                    f'{metric}_count{{phase="{phase}"}} {timing["count"]}',
+                ]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Union[str, Path], prefix: str = "daman"):
+        """Writes the measures for a Prometheus textfile collector."""
+        path = Path(path)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_text(self.prometheus(prefix=prefix))
+        tmp_path.replace(path)
+
+
+def _format_value(value: float):
+    # exact integers (e.g. byte counts) and the shortest float that round-trips
+    if isinstance(value, int):
+        return str(value)
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _metric_name(name: str):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+class JSONLinesExporter:
+    """Metrics hook writing every event as a JSON line to a file or a (text or binary) stream."""
+
+    def __init__(self, target: Union[str, Path, IO[bytes]]):
+        if isinstance(target, (str, Path)):
+            target = Path(target).open("ab")
+        self.stream = target
+        self._lock = Lock()
+
+    def __call__(self, event: dict):
+        line = orjson.dumps(event, default=str) + b"\n"
+        if isinstance(self.stream, io.TextIOBase):
+            line = line.decode()
+        with self._lock:
+            self.stream.write(line)
+            self.stream.flush()
+
+    def close(self):
+        self.stream.close()
+
+
+METRICS = Metrics()
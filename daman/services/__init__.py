@@ -1,4 +1,18 @@
-from daman.services.base import Provider, Progress
+from daman.services.base import (
+    Provider,
+    IndexedProvider,
+    Progress,
+    RangeReader,
+    TransferCancelled,
+    INTERNAL_PREFIX,
+)
 from daman.services.aws import AWSProvider
+from daman.services.simulated import SimulatedProvider
+from daman.services.local import LocalDirProvider
+from daman.services.memory import InMemoryProvider
 
-PROVIDERS = {"aws": AWSProvider}
+PROVIDERS = {
+    "aws": AWSProvider,
+    "local": LocalDirProvider,
+    "memory": InMemoryProvider,
+}
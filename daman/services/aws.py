@@ -1,37 +1,94 @@
-import boto3
 from pathlib import Path
+from threading import Event
 from logging import getLogger
 from typing import Union, IO, AnyStr
 
-from daman.services import Provider, Progress
+from daman.services.base import IndexedProvider, Progress
+from daman.services.index import RemoteIndex, DEFAULT_TTL
+from daman.services.transfer import (
+    MB,
+    DEFAULT_MAX_POOL_CONNECTIONS,
+    read_transfer_settings,
+    transfer_settings,
+)
+from daman.metrics import METRICS
 
 
 logger = getLogger(__name__)
 
 
-class AWSProvider(Provider):
+class AWSProvider(IndexedProvider):
     def __init__(self, config):
+        # boto3 is only imported once the provider is used
+        import boto3
+        from botocore.config import Config
+
         self.bucket = config["service"]["name"]
-        self.s3 = boto3.resource("s3")
+        self.transfer = read_transfer_settings(config)
+        max_pool_connections = max(
+            self.transfer.get("max_pool_connections", DEFAULT_MAX_POOL_CONNECTIONS),
+            self.transfer.get("max_concurrency", 0),
+        )
+        self.s3 = boto3.resource(
+            "s3", config=Config(max_pool_connections=max_pool_connections)
+        )
+        self.index = RemoteIndex.get(
+            name=f"aws-{self.bucket}",
+            lister=self.list_objects,
+            ttl=config["service"].getfloat("index_ttl", fallback=DEFAULT_TTL),
+        )
+
+    @property
+    def description(self):
+        return f"`{self.bucket}` S3 bucket"
+
+    def transfer_config(self, size: int, transfer: dict = None):
+        from boto3.s3.transfer import TransferConfig
+
+        settings = transfer_settings(
+            size=size, settings={**self.transfer, **(transfer or {})}
+        )
+        return TransferConfig(
+            multipart_threshold=int(settings["multipart_threshold"] * MB),
+            multipart_chunksize=int(settings["multipart_chunksize"] * MB),
+            max_concurrency=settings["max_concurrency"],
+            use_threads=settings["use_threads"],
+        )
 
     def download(
-        self, key: str, file_path: Union[str, Path] = None, buffer: IO[AnyStr] = None
+        self,
+        key: str,
+        file_path: Union[str, Path] = None,
+        buffer: IO[AnyStr] = None,
+        transfer: dict = None,
+        cancel: Event = None,
     ):
         # Checking file exists
-        msg = f"{key} does not exist in `{self.bucket}` S3 bucket."
-        assert key in self.keys, msg
+        msg = f"{key} does not exist in {self.description}."
+        assert self.exists(key), msg
+
+        size = self.file_size(key)
+        config = self.transfer_config(size=size, transfer=transfer)
 
         # Initialising progress bar
-        pbar = Progress(size=self.file_size(key), key=key)
+        pbar = Progress(size=size, key=key, cancel=cancel)
 
         # Download
         if file_path is not None:
             self.s3.meta.client.download_file(
-                Bucket=self.bucket, Key=key, Filename=str(file_path), Callback=pbar,
+                Bucket=self.bucket,
+                Key=key,
+                Filename=str(file_path),
+                Callback=pbar,
+                Config=config,
             )
         elif buffer is not None:
             self.s3.meta.client.download_fileobj(
-                Fileobj=buffer, Key=key, Bucket=self.bucket, Callback=pbar,
+                Fileobj=buffer,
+                Key=key,
+                Bucket=self.bucket,
+                Callback=pbar,
+                Config=config,
             )
         else:
             raise ValueError("`buffer` or `file_path` cannot be `None` simultaneously.")
@@ -40,13 +97,20 @@ class AWSProvider(Provider):
         pbar.close()
 
     def upload(
-        self, key: str, file_path: Union[str, Path] = None, buffer: IO[AnyStr] = None
+        self,
+        key: str,
+        file_path: Union[str, Path] = None,
+        buffer: IO[AnyStr] = None,
+        transfer: dict = None,
+        metadata: dict = None,
+        cancel: Event = None,
     ):
         if file_path is not None:
             msg = f"{file_path} does not exist."
             assert file_path.exists(), msg
+            size = file_path.stat().st_size
             # Initialising progress bar
-            pbar = Progress(size=20, key=key)
+            pbar = Progress(size=size, key=key, desc="Uploading", cancel=cancel)
 
             # Upload to bucket
             self.s3.meta.client.upload_file(
@@ -54,21 +118,31 @@ class AWSProvider(Provider):
                 Key=key,
                 Filename=str(file_path),
                 Callback=pbar,
-                ExtraArgs={"Metadata": {"md5": self.md5(file_path=file_path)}},
+                ExtraArgs={
+                    "Metadata": {
+                        **self.metadata(file_path=file_path),
+                        **(metadata or {}),
+                    }
+                },
+                Config=self.transfer_config(size=size, transfer=transfer),
             )
 
             # close progres bar
             pbar.close()
         elif buffer is not None:
+            size = buffer.getbuffer().nbytes
             # Initialising progress bar
-            pbar = Progress(size=buffer.getbuffer().nbytes, key=key)
+            pbar = Progress(size=size, key=key, desc="Uploading", cancel=cancel)
             # Upload to bucket
             self.s3.meta.client.upload_fileobj(
                 Fileobj=buffer,
                 Key=key,
                 Bucket=self.bucket,
                 Callback=pbar,
-                ExtraArgs={"Metadata": {"md5": self.md5(buffer=buffer)}},
+                ExtraArgs={
+                    "Metadata": {**self.metadata(buffer=buffer), **(metadata or {})}
+                },
+                Config=self.transfer_config(size=size, transfer=transfer),
             )
 
             # close progres bar
@@ -77,29 +151,57 @@ class AWSProvider(Provider):
             msg = "either `file_path` or `buffer` must be provided."
             raise ValueError(msg)
 
+        # record the new object (size, etag and md5) in the remote index
+        self.head(key)
+
     def delete(self, key: str):
-        if key in self.keys:
+        if self.exists(key):
             self.s3.meta.client.delete_object(Bucket=self.bucket, Key=key)
+            self.index.discard(key)
         else:
             logger.warning(f"`{key}` already deleted from cloud service.")
 
-    @property
-    def keys(self):
-        return [file.key for file in self.s3.Bucket(self.bucket).objects.all()]
-
-    def file_size(self, key: str):
-        return self.s3.Bucket(self.bucket).Object(key).content_length
-
-    def check_valid(self, key: str, file_path: Union[str, Path]):
-        # get local etag
-        msg = f"{file_path} does not exist."
-        assert file_path.exists(), msg
-        local_md5 = self.md5(file_path=file_path)
-        # get remote etag
-        msg = f"{key} is not available on `{self.bucket}` S3 bucket."
-        if key in self.keys:
-            remote_md5 = self.s3.Bucket(self.bucket).Object(key).metadata["md5"]
-            return local_md5 == remote_md5
-        else:
-            logger.warning(msg)
-            return True
+    def list_objects(self):
+        METRICS.increment("list_requests")
+        paginator = self.s3.meta.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket):
+            for content in page.get("Contents", []):
+                yield {
+                    "key": content["Key"],
+                    "size": content["Size"],
+                    "etag": content["ETag"],
+                    "last_modified": content["LastModified"].isoformat(),
+                }
+
+    def read_range(self, key: str, start: int, end: int):
+        METRICS.increment("range_requests", key=key)
+        response = self.s3.meta.client.get_object(
+            Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end - 1}"
+        )
+        content = response["Body"].read()
+        METRICS.increment("bytes_downloaded", len(content), key=key)
+        return content
+
+    def head(self, key: str):
+        from botocore.exceptions import ClientError
+
+        METRICS.increment("head_requests", key=key)
+        try:
+            response = self.s3.meta.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as error:
+            if error.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                self.index.discard(key)
+                return None
+            raise
+        self.index.add(
+            key,
+            size=response["ContentLength"],
+            etag=response["ETag"],
+            md5=response["Metadata"].get("md5"),
+            fasthash=response["Metadata"].get("fasthash"),
+            codec=response["Metadata"].get("codec"),
+            meta=response["Metadata"].get("meta"),
+            storage=response["Metadata"].get("storage"),
+            last_modified=response["LastModified"].isoformat(),
+        )
+        return self.index[key]
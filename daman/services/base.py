@@ -1,24 +1,54 @@
-import hashlib
-from tqdm import tqdm
+import io
+import time
 from pathlib import Path
+from threading import Event
+from functools import partial
+from logging import getLogger
 from typing import Union, IO, AnyStr
 from abc import abstractmethod, abstractproperty
 
+from daman.utils import hash_content, FAST_HASH
+from daman.metrics import METRICS
+
+
+logger = getLogger(__name__)
+
+# objects stored by daman itself (e.g. meta sidecars) are kept under this prefix
+INTERNAL_PREFIX = ".daman/"
+
+
+class TransferCancelled(Exception):
+    pass
+
 
 class Provider:
+    # set by the session, avoids rehashing unchanged local files
+    hash_cache = None
+
     @abstractmethod
     def __init__(self, config):
         raise NotImplementedError
 
     @abstractmethod
     def download(
-        self, key: str, file_path: Union[str, Path] = None, buffer: IO[AnyStr] = None
+        self,
+        key: str,
+        file_path: Union[str, Path] = None,
+        buffer: IO[AnyStr] = None,
+        transfer: dict = None,
+        cancel: Event = None,
     ):
         raise NotImplementedError
 
     @abstractmethod
     def upload(
-        self, key: str, file_path: Union[str, Path] = None, buffer: IO[AnyStr] = None
+        self,
+        key: str,
+        file_path: Union[str, Path] = None,
+        buffer: IO[AnyStr] = None,
+        transfer: dict = None,
+        metadata: dict = None,
+        cancel: Event = None,
     ):
         raise NotImplementedError
 
@@ -26,6 +56,28 @@ class Provider:
     def keys(self):
         raise NotImplementedError
 
+    def exists(self, key: str):
+        return key in self.keys
+
+    @abstractmethod
+    def head(self, key: str):
+        """Fetches `key` description (size, etag, md5, ...) from the remote, `None` if missing."""
+        raise NotImplementedError
+
+    def entry(self, key: str):
+        """Description of `key`, possibly served from a local index."""
+        return self.head(key)
+
+    def entries(self, prefix: str = None):
+        """Yields `(key, entry)` for the keys starting with `prefix`, entries holding at least their `size`."""
+        for key in self.keys:
+            if prefix is None or key.startswith(prefix):
+                yield key, {"size": self.file_size(key)}
+
+    @abstractmethod
+    def refresh(self):
+        raise NotImplementedError
+
     @abstractmethod
     def check_valid(self, key: str, file_path: Union[str, Path]):
         raise NotImplementedError
@@ -34,41 +86,250 @@ class Provider:
     def file_size(self, key: str):
         raise NotImplementedError
 
+    @abstractmethod
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        """Bytes `start` (included) to `end` (excluded) of `key`, in a single request."""
+        raise NotImplementedError
+
     @abstractmethod
     def delete(self, key: str):
         raise NotImplementedError
 
+    async def adownload(
+        self,
+        key: str,
+        file_path: Union[str, Path] = None,
+        buffer: IO[AnyStr] = None,
+        transfer: dict = None,
+    ):
+        await self._run_cancellable(
+            self.download,
+            key=key,
+            file_path=file_path,
+            buffer=buffer,
+            transfer=transfer,
+        )
+
+    async def aupload(
+        self,
+        key: str,
+        file_path: Union[str, Path] = None,
+        buffer: IO[AnyStr] = None,
+        transfer: dict = None,
+        metadata: dict = None,
+    ):
+        await self._run_cancellable(
+            self.upload,
+            key=key,
+            file_path=file_path,
+            buffer=buffer,
+            transfer=transfer,
+            metadata=metadata,
+        )
+
+    async def adelete(self, key: str):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, partial(self.delete, key=key))
+
+    async def aexists(self, key: str):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(self.exists, key))
+
+    @staticmethod
+    async def _run_cancellable(func, **kwargs):
+        """Runs a blocking transfer in the default executor, stopping it when cancelled."""
+        import asyncio
+
+        cancel = Event()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                None, partial(func, cancel=cancel, **kwargs)
+            )
+        except asyncio.CancelledError:
+            cancel.set()
+            raise
+
     def md5(self, file_path: Union[str, Path] = None, buffer: IO[AnyStr] = None):
-        md5_hash = hashlib.md5()
+        return self.hashes(file_path=file_path, buffer=buffer, algorithms=("md5",))[
+            "md5"
+        ]
 
-        if file_path is not None:
-            buffer = Path(file_path).open("rb")
+    def hashes(
+        self,
+        file_path: Union[str, Path] = None,
+        buffer: IO[AnyStr] = None,
+        algorithms: tuple = ("md5", FAST_HASH),
+    ):
+        if file_path is not None and self.hash_cache is not None:
+            return self.hash_cache.get(file_path, algorithms=algorithms)
+        return hash_content(file_path=file_path, buffer=buffer, algorithms=algorithms)
+
+    def metadata(self, file_path: Union[str, Path] = None, buffer: IO[AnyStr] = None):
+        """Object metadata recorded on upload: md5 and fast hash of the content."""
+        hashes = self.hashes(file_path=file_path, buffer=buffer)
+        return {"md5": hashes["md5"], "fasthash": f"{FAST_HASH}:{hashes[FAST_HASH]}"}
+
+    def local_matches(
+        self, file_path: Union[str, Path], md5: str, fasthash: str = None
+    ):
+        """Compares a local file to remote digests, preferring the fast hash when available."""
+        if fasthash is not None:
+            algorithm, _, digest = fasthash.partition(":")
+            if algorithm == FAST_HASH:
+                hashes = self.hashes(file_path=file_path, algorithms=(algorithm,))
+                return hashes[algorithm] == digest
+        return self.md5(file_path=file_path) == md5
 
-        msg = f"`buffer` and `file_path` cannot be `None` simultaneously."
-        assert buffer is not None, msg
 
-        content = buffer.read()
-        md5_hash.update(content)
-        buffer.seek(0)
+class IndexedProvider(Provider):
+    """Provider whose keys and entries are served from a `RemoteIndex` (`self.index`).
 
-        if file_path is not None:
-            buffer.close()
-        return md5_hash.hexdigest()
+    Keys pushed elsewhere since the last listing are looked up individually with
+    `head`, which keeps the index up to date.
+    """
+
+    index = None
+
+    @property
+    def description(self):
+        """Remote storage as named in log messages."""
+        raise NotImplementedError
+
+    def refresh(self):
+        self.index.refresh()
+
+    @property
+    def keys(self):
+        return [key for key in self.index.keys if not key.startswith(INTERNAL_PREFIX)]
+
+    def entries(self, prefix: str = None):
+        # served from a single (paginated) listing of the storage
+        for key, entry in list(self.index.entries.items()):
+            if key.startswith(INTERNAL_PREFIX):
+                continue
+            if prefix is None or key.startswith(prefix):
+                yield key, entry
+
+    def exists(self, key: str):
+        return key in self.index or self.head(key) is not None
+
+    def file_size(self, key: str):
+        entry = self.index.get_entry(key)
+        if entry is None:
+            entry = self.head(key)
+        return entry["size"]
+
+    def entry(self, key: str):
+        entry = self.index.get_entry(key)
+        if entry is None or entry.get("md5") is None:
+            entry = self.head(key)
+        return entry
+
+    def check_valid(self, key: str, file_path: Union[str, Path]):
+        msg = f"{file_path} does not exist."
+        assert Path(file_path).exists(), msg
+        if self.exists(key):
+            remote = self.entry(key)
+            return self.local_matches(
+                file_path, md5=remote["md5"], fasthash=remote.get("fasthash")
+            )
+        logger.warning(f"{key} is not available on {self.description}.")
+        return True
+
+
+class RangeReader(io.RawIOBase):
+    """Seekable read-only file over a remote object, each read being a ranged request.
+
+    Readers (e.g. parquet) only fetch the parts of the object they actually read.
+    """
+
+    def __init__(self, provider: Provider, key: str, size: int = None):
+        self.provider = provider
+        self.key = key
+        self.size = provider.file_size(key) if size is None else size
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        msg = f"negative seek position {offset}."
+        assert offset >= 0, msg
+        self.position = offset
+        return self.position
+
+    def readinto(self, buffer):
+        end = min(self.position + len(buffer), self.size)
+        if end <= self.position:
+            return 0
+        content = self.provider.read_range(self.key, self.position, end)
+        buffer[: len(content)] = content
+        self.position += len(content)
+        return len(content)
+
+    def readall(self):
+        return self.read(max(self.size - self.position, 0))
 
 
 class Progress:
-    def __init__(self, size: int, key: str):
+    def __init__(
+        self,
+        size: int,
+        key: str,
+        desc: str = "Downloading",
+        cancel: Event = None,
+        record: bool = True,
+    ):
+        from tqdm import tqdm
+
         self.size = size
+        # whether the transferred bytes are recorded in the metrics
+        self.record = record
+        self.cancel = cancel
+        self.key = key
+        self.desc = desc
         self.progress = 0
-        self.progress_bar = tqdm(desc=f"Downloading {key}", total=size, leave=False)
+        self.start = time.perf_counter()
+        # disabled when not attached to a terminal (e.g. batch jobs and servers)
+        self.progress_bar = tqdm(
+            desc=f"{desc} {key}", total=size, leave=False, disable=None
+        )
 
     def __call__(self, bytes: int):
+        if self.cancel is not None and self.cancel.is_set():
+            raise TransferCancelled(f"{self.desc} `{self.key}` cancelled.")
         self.progress += bytes
         self.progress_bar.update(bytes)
 
     def close(self):
         self.progress_bar.update(self.size - self.progress)
         self.progress_bar.close()
+        duration = time.perf_counter() - self.start
+        if self.record:
+            METRICS.increment(
+                "bytes_uploaded" if self.desc == "Uploading" else "bytes_downloaded",
+                self.size,
+                key=self.key,
+            )
+        size = self.size / 2 ** 20
+        logger.info(
+            f"{self.desc} `{self.key}`: {size:.2f} MB in {duration:.2f}s ({size / max(duration, 1e-6):.2f} MB/s)."
+        )
 
     def __exit__(self):
         self.progress_bar.close()
@@ -0,0 +1,171 @@
+import os
+import time
+import atexit
+import orjson
+from pathlib import Path
+from threading import RLock, Timer
+from logging import getLogger
+from typing import Callable, Iterable, Union
+
+from daman.configure import CONFIG_DIR
+
+
+logger = getLogger(__name__)
+
+INDEX_DIR = CONFIG_DIR / "index"
+DEFAULT_TTL = 300  # seconds
+SAVE_DELAY = 5  # seconds, updates of the index are written at most this often
+
+# indexes are shared by every provider instance of the current process
+_INDEXES = {}
+_INDEXES_LOCK = RLock()
+
+
+class RemoteIndex:
+    """Local copy of the remote listing (sizes, etags, md5 metadata, last modified).
+
+    The index is persisted on disc, held once per process and only re-listed
+    once it is older than `ttl` seconds or when `refresh` is called explicitly.
+    Entries added or discarded are written together, `SAVE_DELAY` seconds after
+    the first change (or at exit).
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path, None],
+        lister: Callable[[], Iterable[dict]],
+        ttl: float = DEFAULT_TTL,
+    ):
+        # indexes without path are only held in memory
+        self.path = None if path is None else Path(path)
+        self.lister = lister
+        self.ttl = ttl
+        self.lock = RLock()
+        self._entries = None
+        self.refreshed_at = 0.0
+        self._changed = False
+        self._timer = None
+
+    @classmethod
+    def get(
+        cls,
+        name: str,
+        lister: Callable[[], Iterable[dict]],
+        ttl: float = DEFAULT_TTL,
+        persist: bool = True,
+    ):
+        with _INDEXES_LOCK:
+            index = _INDEXES.get(name)
+            if index is None:
+                path = INDEX_DIR / f"{name}.json" if persist else None
+                index = cls(path=path, lister=lister, ttl=ttl)
+                _INDEXES[name] = index
+            else:
+                index.lister = lister
+                index.ttl = ttl
+            return index
+
+    @property
+    def is_stale(self):
+        return (time.time() - self.refreshed_at) > self.ttl
+
+    @property
+    def entries(self):
+        with self.lock:
+            if self._entries is None:
+                self.load()
+            if self._entries is None or self.is_stale:
+                self.refresh()
+            return self._entries
+
+    def load(self):
+        if self.path is not None and self.path.exists():
+            try:
+                with self.path.open("rb") as fr:
+                    content = orjson.loads(fr.read())
+                self._entries = content["entries"]
+                self.refreshed_at = content["refreshed_at"]
+            except (ValueError, KeyError):
+                logger.warning(
+                    f"remote index `{self.path}` is corrupted and will be rebuilt."
+                )
+
+    def save(self):
+        self._changed = False
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("wb") as fw:
+            fw.write(
+                orjson.dumps(
+                    {"refreshed_at": self.refreshed_at, "entries": self._entries}
+                )
+            )
+        os.replace(tmp_path, self.path)
+
+    def refresh(self):
+        with self.lock:
+            logger.debug(f"refreshing remote index `{self.path}`.")
+            previous = self._entries or {}
+            entries = {}
+            for entry in self.lister():
+                key = entry.pop("key")
+                old_entry = previous.get(key)
+                # object metadata is not part of the listing, keep it while the object is unchanged
+                if old_entry is not None and old_entry.get("etag") == entry.get("etag"):
+                    entry = {**old_entry, **entry}
+                entries[key] = entry
+            self._entries = entries
+            self.refreshed_at = time.time()
+            self.save()
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __getitem__(self, key):
+        return self.entries[key]
+
+    def get_entry(self, key: str):
+        return self.entries.get(key)
+
+    @property
+    def keys(self):
+        return self.entries.keys()
+
+    def _save_later(self):
+        if self.path is None:
+            return
+        self._changed = True
+        # timers are not inherited by forked processes
+        if self._timer is None or not self._timer.is_alive():
+            self._timer = Timer(SAVE_DELAY, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Writes the pending changes of the index."""
+        with self.lock:
+            self._timer = None
+            if self._changed:
+                self.save()
+
+    def add(self, key: str, **fields):
+        with self.lock:
+            entries = self.entries
+            entry = entries.get(key, {})
+            entry.update(fields)
+            entries[key] = entry
+            self._save_later()
+
+    def discard(self, key: str):
+        with self.lock:
+            if self.entries.pop(key, None) is not None:
+                self._save_later()
+
+
+@atexit.register
+def _flush_indexes():
+    with _INDEXES_LOCK:
+        for index in _INDEXES.values():
+            index.flush()
@@ -0,0 +1,72 @@
+import os
+import orjson
+import tempfile
+from pathlib import Path
+from contextlib import contextmanager
+
+from daman.services.simulated import SimulatedProvider
+
+
+# object records are stored apart from the objects, in this folder of the root directory
+RECORDS_FOLDER = ".records"
+
+
+class LocalDirProvider(SimulatedProvider):
+    """Provider storing objects in a local directory (e.g. a shared NFS mount).
+
+    The `[service] name` setting is the path of the directory.
+    """
+
+    kind = "local"
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.root = Path(self.name).expanduser().resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str):
+        return self.root / key
+
+    def _record_path(self, key: str):
+        return self.root / RECORDS_FOLDER / f"{key}.json"
+
+    def _open(self, key: str):
+        return self._path(key).open("rb")
+
+    @contextmanager
+    def _create(self, key: str, record: dict):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=path.parent, prefix=".daman-", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as fw:
+                yield fw
+            record_path = self._record_path(key)
+            record_path.parent.mkdir(parents=True, exist_ok=True)
+            record_path.write_bytes(orjson.dumps(record))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _record(self, key: str):
+        try:
+            return orjson.loads(self._record_path(key).read_bytes())
+        except FileNotFoundError:
+            return None
+
+    def _remove(self, key: str):
+        for path in (self._path(key), self._record_path(key)):
+            if path.exists():
+                os.remove(path)
+
+    def _list(self):
+        records = self.root / RECORDS_FOLDER
+        for root, _, files in os.walk(records):
+            for name in files:
+                if name.endswith(".json"):
+                    path = Path(root) / name[: -len(".json")]
+                    yield path.relative_to(records).as_posix()
@@ -0,0 +1,48 @@
+from io import BytesIO
+from threading import RLock
+from contextlib import contextmanager
+
+from daman.services.simulated import SimulatedProvider
+
+
+# stores shared by every provider of the current process, by name
+_STORES = {}
+_STORES_LOCK = RLock()
+
+
+class InMemoryProvider(SimulatedProvider):
+    """Provider storing objects in memory, for the lifetime of the current process.
+
+    Providers configured with the same `[service] name` share their objects.
+    """
+
+    kind = "memory"
+    persist_index = False
+
+    def __init__(self, config):
+        super().__init__(config)
+        with _STORES_LOCK:
+            self.objects, self.records = _STORES.setdefault(self.name, ({}, {}))
+
+    def _open(self, key: str):
+        return BytesIO(self.objects[key])
+
+    @contextmanager
+    def _create(self, key: str, record: dict):
+        with BytesIO() as buffer:
+            yield buffer
+            with _STORES_LOCK:
+                self.objects[key] = buffer.getvalue()
+                self.records[key] = dict(record)
+
+    def _record(self, key: str):
+        record = self.records.get(key)
+        return None if record is None else dict(record)
+
+    def _remove(self, key: str):
+        with _STORES_LOCK:
+            self.objects.pop(key, None)
+            self.records.pop(key, None)
+
+    def _list(self):
+        return list(self.records)
@@ -0,0 +1,242 @@
+import os
+import time
+import hashlib
+import orjson
+from pathlib import Path
+from threading import Event, Lock
+from logging import getLogger
+from typing import Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from daman.utils import hash_content, FAST_HASH
+from daman.services.base import Provider, Progress
+from daman.services.transfer import MB, DEFAULT_MAX_CONCURRENCY
+
+
+logger = getLogger(__name__)
+
+MAX_PART_SIZE = 8 * MB  # parts are held in memory until written
+STALE_PARTIAL_AGE = 24 * 3600  # seconds
+# prefix of the temporary files written next to their destination
+TMP_PREFIX = ".daman-"
+
+
+class ResumableDownload:
+    """Download of a remote object in parts written to a partial file, resumed after an interruption.
+
+    A journal stored with the partial file in `folder` records the remote version
+    being downloaded (ETag, md5 and size), then each part written. Downloading the
+    same key again only fetches the missing parts through ranged requests, unless
+    the remote object changed in which case the download restarts. Callers must
+    hold the lock of `key`.
+    """
+
+    def __init__(
+        self,
+        provider: Provider,
+        key: str,
+        folder: Union[str, Path],
+        part_size: int = MAX_PART_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ):
+        self.provider = provider
+        self.key = key
+        self.part_size = min(int(part_size), MAX_PART_SIZE)
+        self.max_concurrency = max_concurrency
+        name = hashlib.sha1(key.encode()).hexdigest()
+        self.partial_path = Path(folder) / f"{name}.partial"
+        self.journal_path = Path(folder) / f"{name}.journal"
+
+    def _read_journal(self, version: dict):
+        """Parts already written for `version`, `None` when nothing can be resumed."""
+        try:
+            content = self.journal_path.read_text()
+        except FileNotFoundError:
+            return None
+        # the last line is ignored unless complete
+        lines = content.split("\n")[:-1]
+        if not lines or not self.partial_path.exists():
+            return None
+        try:
+            header = orjson.loads(lines[0])
+        except orjson.JSONDecodeError:
+            return None
+        if header != version:
+            logger.info(
+                f"`{self.key}` changed since its partial download, restarting."
+            )
+            return None
+        return {int(line) for line in lines[1:] if line.isdigit()}
+
+    def discard(self):
+        for path in (self.partial_path, self.journal_path):
+            if path.exists():
+                os.remove(path)
+
+    def run(self, file_path: Union[str, Path], cancel: Event = None):
+        """Downloads the missing parts, then atomically moves the complete file to `file_path`."""
+        remote = self.provider.head(self.key)
+        msg = f"key '{self.key}' not found"
+        assert remote is not None, msg
+        size = remote["size"]
+        version = {
+            "key": self.key,
+            "etag": remote["etag"],
+            "md5": remote.get("md5"),
+            "size": size,
+            "part_size": self.part_size,
+        }
+
+        written = self._read_journal(version)
+        if written is None:
+            self.discard()
+            self.partial_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.partial_path.open("wb") as fw:
+                fw.truncate(size)
+            self.journal_path.write_bytes(orjson.dumps(version) + b"\n")
+            written = set()
+        parts = [
+            index
+            for index in range(-(-size // self.part_size))
+            if index not in written
+        ]
+        if written:
+            logger.info(
+                f"resuming `{self.key}` download, {len(parts)} parts of {self.part_size / MB:.0f} MB missing."
+            )
+
+        # bytes are recorded by the ranged reads
+        pbar = Progress(size=size, key=self.key, cancel=cancel, record=False)
+        pbar(sum(self._part_range(index, size)[1] for index in written))
+        self._download_parts(parts, size=size, progress=pbar)
+        pbar.close()
+
+        if written and not self._verify(remote):
+            # parts written by a previous process did not match, e.g. corrupted
+            logger.warning(
+                f"`{self.key}` resumed download is corrupted, restarting."
+            )
+            self.discard()
+            return self.run(file_path, cancel=cancel)
+        os.replace(self.partial_path, file_path)
+        os.remove(self.journal_path)
+
+    def _part_range(self, index: int, size: int):
+        start = index * self.part_size
+        return start, min(self.part_size, size - start)
+
+    def _download_parts(self, parts: list, size: int, progress: Progress):
+        lock = Lock()
+        failed = Event()
+
+        def download_part(index):
+            if failed.is_set():
+                return
+            start, length = self._part_range(index, size)
+            content = self.provider.read_range(self.key, start, start + length)
+            msg = f"`{self.key}` part {index} is truncated."
+            assert len(content) == length, msg
+            with lock:
+                fw.seek(start)
+                fw.write(content)
+                fw.flush()
+                # recorded once its content is written
+                journal.write(f"{index}\n")
+                journal.flush()
+            progress(length)
+
+        fw = self.partial_path.open("r+b")
+        journal = self.journal_path.open("a")
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                futures = [executor.submit(download_part, index) for index in parts]
+                try:
+                    for future in as_completed(futures):
+                        future.result()
+                except BaseException:
+                    failed.set()
+                    raise
+        finally:
+            fw.close()
+            journal.close()
+
+    def _verify(self, remote: dict):
+        algorithm, _, digest = (remote.get("fasthash") or "").partition(":")
+        if algorithm != FAST_HASH:
+            algorithm, digest = "md5", remote.get("md5")
+        if digest is None:
+            return True
+        hashes = hash_content(file_path=self.partial_path, algorithms=(algorithm,))
+        return hashes[algorithm] == digest
+
+
+def clear_stale_partials(folder: Union[str, Path], locks, max_age: float = None):
+    """Deletes the partial downloads of `folder` untouched for `max_age` seconds.
+
+    Partials whose key is locked (i.e. being downloaded) are kept. Returns the keys
+    of the deleted partials.
+    """
+    folder = Path(folder)
+    if not folder.exists():
+        return []
+    if max_age is None:
+        max_age = STALE_PARTIAL_AGE
+    cleared = []
+    for journal_path in folder.glob("*.journal"):
+        partial_path = journal_path.with_suffix(".partial")
+        try:
+            age = time.time() - max(
+                os.stat(path).st_mtime
+                for path in (journal_path, partial_path)
+                if path.exists()
+            )
+            key = orjson.loads(journal_path.read_text().split("\n", 1)[0])["key"]
+        except (FileNotFoundError, ValueError, KeyError):
+            continue
+        if age < max_age:
+            continue
+        lock = locks.get(key)
+        try:
+            lock.acquire(timeout=0)
+        except TimeoutError:
+            continue
+        try:
+            ResumableDownload(provider=None, key=key, folder=folder).discard()
+            cleared.append(key)
+        finally:
+            lock.release()
+    # partial files left without journal (e.g. killed while starting)
+    for partial_path in folder.glob("*.partial"):
+        if not partial_path.with_suffix(".journal").exists():
+            try:
+                if time.time() - os.stat(partial_path).st_mtime >= max_age:
+                    os.remove(partial_path)
+            except FileNotFoundError:
+                pass
+    return cleared
+
+
+def clear_stale_tmp_files(
+    folder: Union[str, Path], max_age: float = None, dry_run: bool = False
+):
+    """Deletes the temporary files (`.daman-*.tmp`) of `folder` untouched for `max_age` seconds.
+
+    They are left behind by the pushes and downloads of killed processes. Returns
+    the deleted paths, which are only listed when `dry_run`.
+    """
+    if max_age is None:
+        max_age = STALE_PARTIAL_AGE
+    cleared = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if not (name.startswith(TMP_PREFIX) and name.endswith(".tmp")):
+                continue
+            tmp_path = Path(root) / name
+            try:
+                if time.time() - os.stat(tmp_path).st_mtime >= max_age:
+                    if not dry_run:
+                        os.remove(tmp_path)
+                    cleared.append(str(tmp_path))
+            except FileNotFoundError:
+                pass
+    return cleared
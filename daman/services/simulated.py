@@ -0,0 +1,199 @@
+import os
+import time
+import hashlib
+from pathlib import Path
+from threading import Event
+from datetime import datetime, timezone
+from contextlib import contextmanager
+from logging import getLogger
+from typing import Union, IO, AnyStr, Iterable
+
+from daman.utils import CHUNK_SIZE
+from daman.services.base import IndexedProvider, Progress
+from daman.services.index import RemoteIndex, DEFAULT_TTL
+from daman.services.transfer import MB
+from daman.metrics import METRICS
+
+
+logger = getLogger(__name__)
+
+# object metadata recorded on upload, returned by `head`
+METADATA_FIELDS = ("md5", "fasthash", "codec", "meta", "storage")
+
+
+class SimulatedProvider(IndexedProvider):
+    """Base of the providers storing objects on the local machine.
+
+    Requests are delayed by `latency` seconds and transfers throttled to `bandwidth`
+    MB/s (`[service]` settings) to reproduce the performance of a remote storage.
+    Keys are indexed as with `AWSProvider`, so that daman behaves as it would
+    with a cloud service.
+    """
+
+    kind = None
+    # whether the remote index is kept on disc between processes
+    persist_index = True
+
+    def __init__(self, config):
+        settings = config["service"]
+        self.name = settings["name"]
+        self.latency = settings.getfloat("latency", fallback=0.0)
+        self.bandwidth = settings.getfloat("bandwidth", fallback=None)
+        self.index = RemoteIndex.get(
+            name=f"{self.kind}-{hashlib.md5(self.name.encode()).hexdigest()}",
+            lister=self.list_objects,
+            ttl=settings.getfloat("index_ttl", fallback=DEFAULT_TTL),
+            persist=self.persist_index,
+        )
+
+    @property
+    def description(self):
+        return f"`{self.name}` {self.kind} storage"
+
+    # storage primitives implemented by each provider
+    def _open(self, key: str) -> IO[bytes]:
+        raise NotImplementedError
+
+    @contextmanager
+    def _create(self, key: str, record: dict):
+        """Yields a file whose content and `record` are stored under `key` on success."""
+        raise NotImplementedError
+
+    def _record(self, key: str) -> dict:
+        """Record of `key` (size, etag, last_modified and metadata), `None` if missing."""
+        raise NotImplementedError
+
+    def _remove(self, key: str):
+        raise NotImplementedError
+
+    def _list(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def _request(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _copy(self, source: IO[bytes], target: IO[bytes], progress: Progress):
+        while True:
+            content = source.read(CHUNK_SIZE)
+            if not content:
+                return
+            target.write(content)
+            progress(len(content))
+            if self.bandwidth:
+                time.sleep(len(content) / (self.bandwidth * MB))
+
+    def download(
+        self,
+        key: str,
+        file_path: Union[str, Path] = None,
+        buffer: IO[AnyStr] = None,
+        transfer: dict = None,
+        cancel: Event = None,
+    ):
+        msg = f"{key} does not exist in {self.description}."
+        assert self.exists(key), msg
+
+        self._request()
+        pbar = Progress(size=self.file_size(key), key=key, cancel=cancel)
+        with self._open(key) as source:
+            if file_path is not None:
+                file_path = Path(file_path)
+                tmp_path = file_path.with_name(f".daman-{file_path.name}.tmp")
+                try:
+                    with tmp_path.open("wb") as target:
+                        self._copy(source, target, pbar)
+                    os.replace(tmp_path, file_path)
+                except BaseException:
+                    if tmp_path.exists():
+                        os.remove(tmp_path)
+                    raise
+            elif buffer is not None:
+                self._copy(source, buffer, pbar)
+            else:
+                raise ValueError(
+                    "`buffer` or `file_path` cannot be `None` simultaneously."
+                )
+        pbar.close()
+
+    def upload(
+        self,
+        key: str,
+        file_path: Union[str, Path] = None,
+        buffer: IO[AnyStr] = None,
+        transfer: dict = None,
+        metadata: dict = None,
+        cancel: Event = None,
+    ):
+        if file_path is not None:
+            file_path = Path(file_path)
+            msg = f"{file_path} does not exist."
+            assert file_path.exists(), msg
+            size = file_path.stat().st_size
+            metadata = {**self.metadata(file_path=file_path), **(metadata or {})}
+            source = file_path.open("rb")
+        elif buffer is not None:
+            size = buffer.getbuffer().nbytes
+            metadata = {**self.metadata(buffer=buffer), **(metadata or {})}
+            source = buffer
+        else:
+            msg = "either `file_path` or `buffer` must be provided."
+            raise ValueError(msg)
+
+        record = {
+            "size": size,
+            # single part S3 etags are the quoted md5 of the content
+            "etag": f'"{metadata["md5"]}"',
+            "last_modified": datetime.now(timezone.utc).isoformat(),
+            **{field: metadata.get(field) for field in METADATA_FIELDS},
+        }
+        self._request()
+        pbar = Progress(size=size, key=key, desc="Uploading", cancel=cancel)
+        try:
+            with self._create(key, record) as target:
+                self._copy(source, target, pbar)
+        finally:
+            if file_path is not None:
+                source.close()
+        pbar.close()
+
+        self.index.add(key, **record)
+
+    def read_range(self, key: str, start: int, end: int):
+        METRICS.increment("range_requests", key=key)
+        self._request()
+        with self._open(key) as source:
+            source.seek(start)
+            content = source.read(end - start)
+        if self.bandwidth:
+            time.sleep(len(content) / (self.bandwidth * MB))
+        METRICS.increment("bytes_downloaded", len(content), key=key)
+        return content
+
+    def delete(self, key: str):
+        self._request()
+        self._remove(key)
+        self.index.discard(key)
+
+    def list_objects(self):
+        METRICS.increment("list_requests")
+        self._request()
+        for key in self._list():
+            record = self._record(key)
+            if record is not None:
+                yield {
+                    "key": key,
+                    "size": record["size"],
+                    "etag": record["etag"],
+                    "last_modified": record["last_modified"],
+                }
+
+    def head(self, key: str):
+        METRICS.increment("head_requests", key=key)
+        self._request()
+        record = self._record(key)
+        if record is None:
+            self.index.discard(key)
+            return None
+        self.index.add(key, **record)
+        return self.index[key]
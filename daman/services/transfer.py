@@ -0,0 +1,58 @@
+from typing import Union
+from configparser import ConfigParser
+
+
+MB = 2 ** 20
+MAX_PARTS = 10000  # maximum number of parts of a multipart upload
+DEFAULT_MAX_CONCURRENCY = 10
+DEFAULT_MAX_POOL_CONNECTIONS = 32
+
+# setting name -> parser of the value stored in the `transfer` config section
+TRANSFER_SETTINGS = {
+    "multipart_threshold": int,  # MB
+    "multipart_chunksize": int,  # MB
+    "max_concurrency": int,
+    "max_pool_connections": int,
+    "use_threads": lambda value: str(value).lower() in ("1", "true", "yes", "on"),
+}
+
+
+def read_transfer_settings(config: Union[ConfigParser, dict] = None):
+    if config is None or "transfer" not in config:
+        return {}
+    return {
+        name: parse(config["transfer"][name])
+        for name, parse in TRANSFER_SETTINGS.items()
+        if config["transfer"].get(name) is not None
+    }
+
+
+def transfer_settings(size: int, settings: dict = None):
+    """Transfer settings for an object of `size` bytes.
+
+    Unset values default to settings scaled with the object size: larger parts
+    and more concurrent requests for larger objects, never exceeding the
+    number of parts allowed by multipart uploads.
+    """
+    settings = dict(settings or {})
+    min_chunksize = -(-size // (MAX_PARTS * MB))
+    if settings.get("multipart_chunksize") is None:
+        if size < 256 * MB:
+            chunksize = 8
+        elif size < 4096 * MB:
+            chunksize = 32
+        else:
+            chunksize = 128
+        settings["multipart_chunksize"] = max(chunksize, min_chunksize)
+    else:
+        settings["multipart_chunksize"] = max(
+            settings["multipart_chunksize"], min_chunksize
+        )
+    settings.setdefault("multipart_threshold", settings["multipart_chunksize"])
+    if settings.get("max_concurrency") is None:
+        parts = size / (settings["multipart_chunksize"] * MB)
+        settings["max_concurrency"] = int(
+            min(DEFAULT_MAX_POOL_CONNECTIONS, max(DEFAULT_MAX_CONCURRENCY, parts // 2))
+        )
+    settings.setdefault("use_threads", True)
+    return settings
@@ -0,0 +1,133 @@
+import os
+from pathlib import Path
+from threading import RLock
+from logging import getLogger
+from typing import Union
+from configparser import ConfigParser
+
+from daman.configure import CONFIG_DIR
+from daman.services import PROVIDERS
+from daman.data import DataRegistery, HashCache, ChunkStore, KeyLocks
+
+
+logger = getLogger(__name__)
+
+LOCAL_CHUNK_FOLDER = ".chunks"
+LOCAL_LOCK_FOLDER = ".locks"
+LOCAL_PARTIAL_FOLDER = ".partials"
+
+
+class Session:
+    """Holds the configuration, registery and provider used by a `DataManager`.
+
+    Everything is built once and kept alive (including the provider connection
+    pool) until the configuration file is modified on disc.
+    """
+
+    def __init__(self, config_path: Union[str, Path] = None):
+        if config_path is None:
+            config_path = CONFIG_DIR / "config"
+        self.config_path = Path(config_path)
+        self.lock = RLock()
+        self._mtime = None
+        self._config = None
+        self._data_folder = None
+        self._registery = None
+        self._hash_cache = None
+        self._chunk_store = None
+        self._locks = None
+        self._service = None
+
+    def _config_mtime(self):
+        try:
+            return os.stat(self.config_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _ensure_loaded(self):
+        mtime = self._config_mtime()
+        if self._config is None or mtime != self._mtime:
+            with self.lock:
+                if self._config is None or mtime != self._mtime:
+                    self.load(mtime=mtime)
+
+    def load(self, mtime: int = None):
+        with self.lock:
+            if self._config is not None:
+                logger.info(f"`{self.config_path}` changed, reloading configuration.")
+            config = ConfigParser()
+            config.read(self.config_path)
+            self._config = config
+            self._mtime = self._config_mtime() if mtime is None else mtime
+            self._data_folder = None
+            self._registery = None
+            self._hash_cache = None
+            self._chunk_store = None
+            self._locks = None
+            self._service = None
+
+    @property
+    def config(self):
+        self._ensure_loaded()
+        return self._config
+
+    @property
+    def data_folder(self):
+        self._ensure_loaded()
+        if self._data_folder is None:
+            d_folder = Path(self._config["local"]["data_dir"])
+            if not d_folder.exists():
+                d_folder.mkdir(parents=True, exist_ok=True)
+            self._data_folder = d_folder
+        return self._data_folder
+
+    @property
+    def registery(self):
+        self._ensure_loaded()
+        if self._registery is None:
+            self._registery = DataRegistery()
+        return self._registery
+
+    @property
+    def hash_cache(self):
+        self._ensure_loaded()
+        if self._hash_cache is None:
+            self._hash_cache = HashCache(self.registery)
+        return self._hash_cache
+
+    @property
+    def chunk_store(self):
+        self._ensure_loaded()
+        if self._chunk_store is None:
+            self._chunk_store = ChunkStore(
+                self.registery, folder=self.data_folder / LOCAL_CHUNK_FOLDER
+            )
+        return self._chunk_store
+
+    @property
+    def locks(self):
+        self._ensure_loaded()
+        if self._locks is None:
+            self._locks = KeyLocks(self.data_folder / LOCAL_LOCK_FOLDER)
+        return self._locks
+
+    @property
+    def partial_folder(self):
+        return self.data_folder / LOCAL_PARTIAL_FOLDER
+
+    @property
+    def service(self):
+        self._ensure_loaded()
+        if self._service is None:
+            with self.lock:
+                if self._service is None:
+                    req_service = self._config["service"]["service"]
+                    if req_service in PROVIDERS:
+                        service = PROVIDERS[req_service](config=self._config)
+                        service.hash_cache = self.hash_cache
+                        self._service = service
+                    else:
+                        raise KeyError(
+                            f"service `{req_service}` requested is not available among provided services."
+                        )
+        return self._service
@@ -1,9 +1,20 @@
-from typing import Union
+import hashlib
+from typing import Union, IO, AnyStr
 from pathlib import Path
 from os.path import getsize
 
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - optional dependency
+    xxhash = None
+
 unit_map = {None: 2 ** 0, "K": 2 ** 10, "M": 2 ** 20, "G": 2 ** 30}
 
+CHUNK_SIZE = 8 * 2 ** 20  # bytes read at once when hashing
+
+# fast non cryptographic hash recorded alongside md5
+FAST_HASH = "xxh3_128" if xxhash is not None else "blake2b"
+
 
 def dir_size(dir: Union[str, Path], unit="M"):
     msg = f"unit '{unit}' not recognized. Allowed units: [{list(unit_map.keys())}]"
@@ -12,6 +23,72 @@ def dir_size(dir: Union[str, Path], unit="M"):
     dir_size = 0
     for file in Path(dir).rglob("*"):
         if file.is_file():
-            dir_size += getsize(dir)
+            dir_size += getsize(file)
 
     return dir_size // unit_map[unit]
+
+
+def new_hasher(algorithm: str):
+    if algorithm == "xxh3_128":
+        msg = "`xxhash` must be installed to use `xxh3_128` hashes."
+        assert xxhash is not None, msg
+        return xxhash.xxh3_128()
+    return hashlib.new(algorithm)
+
+
+def hash_content(
+    file_path: Union[str, Path] = None,
+    buffer: IO[AnyStr] = None,
+    algorithms: tuple = ("md5", FAST_HASH),
+    chunk_size: int = CHUNK_SIZE,
+):
+    """Hashes a file or buffer chunk by chunk, returns one hex digest per algorithm."""
+    if file_path is not None:
+        buffer = Path(file_path).open("rb")
+
+    msg = f"`buffer` and `file_path` cannot be `None` simultaneously."
+    assert buffer is not None, msg
+
+    hashers = {algorithm: new_hasher(algorithm) for algorithm in algorithms}
+    try:
+        for chunk in iter(lambda: buffer.read(chunk_size), b""):
+            for hasher in hashers.values():
+                hasher.update(chunk)
+    finally:
+        if file_path is not None:
+            buffer.close()
+        else:
+            buffer.seek(0)
+
+    return {algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()}
+
+
+class HashingWriter:
+    """Write-only file wrapper hashing the content as it is written."""
+
+    def __init__(self, file: IO[bytes], algorithms: tuple = ("md5", FAST_HASH)):
+        self.file = file
+        self.hashers = {algorithm: new_hasher(algorithm) for algorithm in algorithms}
+        self.position = 0
+
+    def write(self, data):
+        for hasher in self.hashers.values():
+            hasher.update(data)
+        self.position += memoryview(data).nbytes
+        return self.file.write(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        self.file.flush()
+
+    @property
+    def closed(self):
+        return self.file.closed
+
+    @property
+    def hashes(self):
+        return {
+            algorithm: hasher.hexdigest() for algorithm, hasher in self.hashers.items()
+        }
@@ -18,7 +18,7 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/sofiane87/daman",
-    python_requires=">=3.6.0",
+    python_requires=">=3.7.0",
     version="0.2.0",
     packages=find_packages("."),
     package_dir={"": "."},
@@ -32,6 +32,7 @@ setup(
             "dm_delete = daman.commands:delete_command",
             "dm_clear = daman.commands:clear_command",
             "dm_summary = daman.commands:summary_command",
+            "dm_prefetch = daman.commands:prefetch_command",
         ]
     },
     project_urls={"Bug Tracker": "https://github.com/sofiane87/daman/issues"},